@@ -4,30 +4,149 @@
 
 
 
+import copy
 import json
+import os
 import re
 import spacy
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteria, StoppingCriteriaList
 import time
+import hashlib
+from threading import Lock
+from claim_cache import ClaimCache, DEFAULT_CACHE_PATH, make_cache_key
+from near_duplicates import NearDuplicateIndex
+from triage import DEFAULT_TRIAGE_MODEL_PATH, load_triage_model
 
-# Load spaCy for natural language processing
-nlp = spacy.load("en_core_web_sm")
+MODEL_NAME = "microsoft/Phi-3-mini-4k-instruct"
+SPACY_MODEL = "en_core_web_sm"
 
-# Verify GPU availability
-print(f"CUDA available: {torch.cuda.is_available()}")
-if torch.cuda.is_available():
-    print(f"GPU device: {torch.cuda.get_device_name(0)}")
-else:
-    print("Warning: GPU not detected. Running on CPU will be slow.")
+# Inference backends for the Phi-3 validator. FP16 is only fast on GPUs; on CPU
+# use fp32, bf16 (hosts with native bf16 support) or int8 dynamically quantized
+# linear layers. Select with ModelRegistry(backend=...) or ANALYSIS_BACKEND.
+BACKENDS = {
+    "cuda-fp16": {"device": "cuda", "dtype": torch.float16, "quantize": False},
+    "cpu-fp32": {"device": "cpu", "dtype": torch.float32, "quantize": False},
+    "cpu-bf16": {"device": "cpu", "dtype": torch.bfloat16, "quantize": False},
+    "cpu-int8": {"device": "cpu", "dtype": torch.float32, "quantize": True},
+}
 
-# Load the Phi-3-mini-4k-instruct model and tokenizer
-model_name = "microsoft/Phi-3-mini-4k-instruct"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float16)  # FP16 for efficiency
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model.to(device)
-print(f"Model loaded on {device} with {torch.cuda.get_device_name(0) if torch.cuda.is_available() else 'CPU'}")
+def resolve_backend(backend="auto"):
+    """Map "auto" to cuda-fp16 when a GPU is present and cpu-fp32 otherwise."""
+    if backend == "auto":
+        return "cuda-fp16" if torch.cuda.is_available() else "cpu-fp32"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}'. Choose one of: auto, {', '.join(BACKENDS)}")
+    return backend
+
+class ModelRegistry:
+    """Process-wide, lazily initialised holder for the spaCy pipeline and the Phi-3 model.
+
+    Nothing is loaded at import time; the first caller pays the load and every
+    later caller in the process shares the same warm instances.
+    """
+    def __init__(self, model_name=MODEL_NAME, spacy_model=SPACY_MODEL, backend=None):
+        self.model_name = model_name
+        self.spacy_model = spacy_model
+        self.backend = resolve_backend(backend or os.environ.get("ANALYSIS_BACKEND", "auto"))
+        self.lock = Lock()
+        self._nlp = None
+        self._tokenizer = None
+        self._model = None
+        self._device = None
+        self._prefix_caches = {}
+
+    def get_nlp(self):
+        """Return the shared spaCy pipeline, loading it on first use."""
+        if self._nlp is None:
+            with self.lock:
+                if self._nlp is None:
+                    self._nlp = spacy.load(self.spacy_model)
+        return self._nlp
+
+    def get_tokenizer(self):
+        """Return the shared Phi-3 tokenizer without loading the model weights."""
+        if self._tokenizer is None:
+            with self.lock:
+                if self._tokenizer is None:
+                    self._load_tokenizer()
+        return self._tokenizer
+
+    def _load_tokenizer(self):
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        tokenizer.padding_side = "left"  # Decoder-only models continue from the right edge when batched
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        self._tokenizer = tokenizer
+
+    def get_llm(self):
+        """Return (tokenizer, model, device), loading Phi-3 on first use."""
+        if self._model is None:
+            with self.lock:
+                if self._model is None:
+                    self._load_llm()
+        return self._tokenizer, self._model, self._device
+
+    def set_backend(self, backend):
+        """Choose the inference backend; must be called before the model is loaded."""
+        backend = resolve_backend(backend)
+        with self.lock:
+            if self._model is not None and backend != self.backend:
+                raise RuntimeError(f"Model already loaded with backend '{self.backend}'")
+            self.backend = backend
+
+    def _load_llm(self):
+        config = BACKENDS[self.backend]
+        # Verify GPU availability
+        print(f"CUDA available: {torch.cuda.is_available()}")
+        if config["device"] == "cuda":
+            if not torch.cuda.is_available():
+                raise RuntimeError(f"Backend '{self.backend}' needs a GPU but CUDA is not available")
+            print(f"GPU device: {torch.cuda.get_device_name(0)}")
+
+        if self._tokenizer is None:
+            self._load_tokenizer()
+        model = AutoModelForCausalLM.from_pretrained(self.model_name, torch_dtype=config["dtype"])
+        device = torch.device(config["device"])
+        model.to(device)
+        model.eval()
+        if config["quantize"]:
+            # Int8 weights for every Linear layer; activations are quantized on the fly
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        print(f"Model loaded on {device} with backend {self.backend}")
+        self._device = device
+        self._model = model  # Assigned last: it is the "loaded" flag checked without the lock
+
+    def get_prefix_cache(self, prefix):
+        """Return (prefix_ids, past_key_values) for a prompt prefix, encoded once per process."""
+        tokenizer, model, device = self.get_llm()
+        if prefix not in self._prefix_caches:
+            with self.lock:
+                if prefix not in self._prefix_caches:
+                    prefix_ids = tokenizer(prefix, return_tensors="pt")["input_ids"].to(device)
+                    with torch.no_grad():
+                        past_key_values = model(input_ids=prefix_ids, use_cache=True).past_key_values
+                    self._prefix_caches[prefix] = (prefix_ids, past_key_values)
+        return self._prefix_caches[prefix]
+
+    def is_loaded(self):
+        return self._model is not None
+
+    def warm_up(self, nlp=True, llm=True):
+        """Eagerly load the requested models so the first analysis call is not a cold start."""
+        start_time = time.time()
+        if nlp:
+            self.get_nlp()
+        if llm:
+            self.get_llm()
+        print(f"Models warmed up in {time.time() - start_time:.2f} seconds")
+
+# Shared registry used by every analysis function in this process
+registry = ModelRegistry()
+
+def warm_up(nlp=True, llm=True):
+    """Explicit warm-up hook, e.g. for a server start-up or a background thread."""
+    registry.warm_up(nlp=nlp, llm=llm)
 
 # Function to extract valid historical/economic claims from text
 def extract_valid_claims(text):
@@ -35,94 +154,480 @@ def extract_valid_claims(text):
     if not isinstance(text, str) or not text.strip():
         return []
     
-    doc = nlp(text)
+    doc = registry.get_nlp()(text)
     return [sent.text.strip() for sent in doc.sents if len(sent.text) > 20 and not is_irrelevant_claim(sent.text)]
 
+IRRELEVANT_KEYWORDS = [
+    "welcome", "thread", "question", "ask", "simple", "silly", "rules", "guidelines", "discuss",
+    "discussion", "community", "promote", "advertise", "opinion", "thoughts", "well", "good", "try", "dreams"
+]
+# One word-boundary pass per sentence; common inflections ("questions", "asked") still match
+IRRELEVANT_PATTERN = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, IRRELEVANT_KEYWORDS)) + r")(?:s|es|ed|ing)?\b",
+    re.IGNORECASE
+)
+
 # Function to determine if a claim is irrelevant
 def is_irrelevant_claim(claim):
     """Determine if a claim is irrelevant based on specific keywords or phrases."""
-    irrelevant_keywords = [
-        "welcome", "thread", "question", "ask", "simple", "silly", "rules", "guidelines", "discuss",
-        "discussion", "community", "promote", "advertise", "opinion", "thoughts", "well", "good", "try", "dreams"
-    ]
-    claim_lower = claim.lower()
-    return any(keyword in claim_lower for keyword in irrelevant_keywords)
+    return IRRELEVANT_PATTERN.search(claim) is not None
 
-def extract_and_validate_claims_with_phi3(text):
-    """Use the LLM to extract and validate claims directly from the text."""
+# Tokens of text per prompt once the template is added; stays under MAX_INPUT_LENGTH
+CHUNK_TOKEN_BUDGET = 768
+
+def split_into_claim_chunks(text, token_budget=CHUNK_TOKEN_BUDGET):
+    """Pre-filter a text down to candidate claim sentences packed into token-budgeted chunks.
+
+    Sentences are kept in order and greedily packed so each chunk fits the
+    budget; a single sentence longer than the budget (common in unpunctuated
+    transcripts) is split on token boundaries. Every candidate sentence ends up
+    in some chunk, so nothing is silently truncated by the tokenizer.
+    """
+    sentences = extract_valid_claims(text)
+    if not sentences:
+        return []
+    tokenizer = registry.get_tokenizer()
+    token_ids = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+
+    chunks = []
+    current, current_tokens = [], 0
+    for sentence, ids in zip(sentences, token_ids):
+        if len(ids) > token_budget:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            for start in range(0, len(ids), token_budget):
+                chunks.append(tokenizer.decode(ids[start:start + token_budget]).strip())
+            continue
+        if current_tokens + len(ids) > token_budget:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += len(ids)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+# The prompt is split around the text so the shared prefix can be encoded once and reused
+PROMPT_PREFIX = (
+    "You are an expert in history and economics. Analyze the following text and extract all historically or economically significant claims. "
+    "For each claim, evaluate its accuracy based on facts up to April 2024. Provide a brief explanation for each claim and conclude with "
+    "'Verdict: True' or 'Verdict: False'.\n\n"
+    "Text:"
+)
+PROMPT_SUFFIX = (
+    "\n\n"
+    "Output the results in the format:\n"
+    "- Claim: <claim>\n  Status: <True/False>\n  Explanation: <explanation>\n"
+)
+PROMPT_TEMPLATE = PROMPT_PREFIX + " {text}" + PROMPT_SUFFIX
+
+MAX_INPUT_LENGTH = 1024
+GENERATION_KWARGS = {
+    "max_new_tokens": 500,  # Allow for longer responses
+    "temperature": 0.7,
+    "do_sample": True
+}
+BATCH_SIZE = 8
+# Generation stops for a sequence once a single claim block runs past this many tokens
+MAX_TOKENS_PER_CLAIM = 160
+# ...or once this many lines in a row after the last claim block are not part of any claim block
+MAX_NON_CLAIM_LINES = 3
+
+def build_prompt(text):
+    return PROMPT_TEMPLATE.format(text=text)
+
+def parse_claims(response):
+    """Parse the model response into (claim, status, explanation) tuples."""
     validated_claims = []
-    start_time = time.time()
-    prompt = (
-        f"You are an expert in history and economics. Analyze the following text and extract all historically or economically significant claims. "
-        f"For each claim, evaluate its accuracy based on facts up to April 2024. Provide a brief explanation for each claim and conclude with "
-        f"'Verdict: True' or 'Verdict: False'.\n\n"
-        f"Text: {text}\n\n"
-        f"Output the results in the format:\n"
-        f"- Claim: <claim>\n  Status: <True/False>\n  Explanation: <explanation>\n"
-    )
-    inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=1024).to(device)
-    
-    with torch.no_grad():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=500,  # Allow for longer responses
-            temperature=0.7,
-            do_sample=True
-        )
-    
-    response = tokenizer.decode(outputs[0], skip_special_tokens=True).strip()
-    end_time = time.time()
-    print(f"Processed text in {end_time - start_time:.2f} seconds")
-    
-    # Parse the response into claims, statuses, and explanations
+    claim, status = None, None
     for line in response.split("\n"):
         if line.startswith("- Claim:"):
             claim = line.replace("- Claim:", "").strip()
+            status = None
         elif line.startswith("  Status:"):
             status = line.replace("  Status:", "").strip()
-        elif line.startswith("  Explanation:"):
+        elif line.startswith("  Explanation:") and claim is not None and status is not None:
             explanation = line.replace("  Explanation:", "").strip()
             validated_claims.append((claim, status, explanation))
-    
+            claim, status = None, None
     return validated_claims
 
-# Update the analyze_json function to use the new approach
-def analyze_json(file_path):
-    """Analyze JSON data to extract and validate claims."""
-    print(f"Attempting to load JSON file: {file_path}")
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        print(f"Successfully loaded JSON with {len(data)} top-level entries")
-    except Exception as e:
-        print(f"Error loading JSON: {str(e)}")
-        return
+class ClaimOutputStoppingCriteria(StoppingCriteria):
+    """Stop each sequence once its claim list is complete or one claim runs over budget.
+
+    The list counts as complete when, after at least one Claim/Status/Explanation
+    block, MAX_NON_CLAIM_LINES lines in a row belong to no claim block (the
+    model has moved on to commentary that parse_claims would ignore anyway).
+    Blank lines and "Verdict:" lines, which the prompt asks for, do not count,
+    so they never cut off the claims that follow them.
+    """
+    def __init__(self, tokenizer, prompt_length, max_tokens_per_claim=MAX_TOKENS_PER_CLAIM):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.max_tokens_per_claim = max_tokens_per_claim
+        self.done = None
+        self.claim_start = None
 
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.done is None:
+            self.done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+            self.claim_start = [None] * input_ids.shape[0]
+        step = input_ids.shape[1] - self.prompt_length
+        # Lines only change state when they end, so only fully decode rows that just emitted a newline
+        last_tokens = self.tokenizer.batch_decode(input_ids[:, -1:])
+        for row, last_token in enumerate(last_tokens):
+            if self.done[row]:
+                continue
+            if "\n" in last_token:
+                text = self.tokenizer.decode(input_ids[row, self.prompt_length:], skip_special_tokens=True)
+                lines = text.split("\n")[:-1]
+                if lines and lines[-1].startswith("- Claim:"):
+                    self.claim_start[row] = step
+                elif lines and lines[-1].startswith("  Explanation:"):
+                    self.claim_start[row] = None
+                if self._list_complete(lines):
+                    self.done[row] = True
+                    continue
+            if self.claim_start[row] is not None and step - self.claim_start[row] > self.max_tokens_per_claim:
+                self.done[row] = True
+        return self.done.clone()
+
+    @staticmethod
+    def _list_complete(lines):
+        seen_block = False
+        non_claim_lines = 0
+        for line in lines:
+            if line.startswith("  Explanation:"):
+                seen_block = True
+            if not line.strip():
+                continue
+            if line.startswith(("- Claim:", " ")) or line.lstrip("-* ").startswith("Verdict:"):
+                non_claim_lines = 0
+            elif seen_block:
+                non_claim_lines += 1
+                if non_claim_lines >= MAX_NON_CLAIM_LINES:
+                    return True
+        return False
+
+def encode_prompt_bodies(texts):
+    """Token IDs of each prompt after PROMPT_PREFIX.
+
+    Long texts are truncated so the whole prompt fits MAX_INPUT_LENGTH, but the
+    output-format instructions after the text are always kept.
+    """
+    tokenizer = registry.get_tokenizer()
+    prefix_length = len(tokenizer(PROMPT_PREFIX)["input_ids"])
+    suffix_ids = tokenizer(PROMPT_SUFFIX, add_special_tokens=False)["input_ids"]
+    text_budget = MAX_INPUT_LENGTH - prefix_length - len(suffix_ids)
+    text_ids = tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+    return [ids[:text_budget] + suffix_ids for ids in text_ids]
+
+def _expand_cache(past_key_values, batch_size):
+    past_key_values = copy.deepcopy(past_key_values)
+    if batch_size == 1:
+        return past_key_values
+    if isinstance(past_key_values, tuple):  # Legacy per-layer (key, value) tuples
+        return tuple(tuple(t.repeat_interleave(batch_size, dim=0) for t in layer) for layer in past_key_values)
+    past_key_values.batch_repeat_interleave(batch_size)
+    return past_key_values
+
+def generate_responses(bodies):
+    """Run one generate call for a batch of encoded prompt bodies.
+
+    The prompt prefix is not re-encoded: its cached keys/values are copied for
+    every row and the bodies are left-padded after it. Returns the decoded
+    responses and the number of tokens generated.
+    """
+    tokenizer, model, device = registry.get_llm()
+    prefix_ids, prefix_cache = registry.get_prefix_cache(PROMPT_PREFIX)
+    width = max(len(ids) for ids in bodies)
+    pad_id = tokenizer.pad_token_id
+    body_ids = torch.tensor([[pad_id] * (width - len(ids)) + ids for ids in bodies], device=device)
+    body_mask = torch.tensor([[0] * (width - len(ids)) + [1] * len(ids) for ids in bodies], device=device)
+    input_ids = torch.cat([prefix_ids.expand(len(bodies), -1), body_ids], dim=1)
+    attention_mask = torch.cat([torch.ones_like(prefix_ids).expand(len(bodies), -1), body_mask], dim=1)
+
+    with torch.no_grad():
+        outputs = model.generate(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            past_key_values=_expand_cache(prefix_cache, len(bodies)),
+            stopping_criteria=StoppingCriteriaList([ClaimOutputStoppingCriteria(tokenizer, input_ids.shape[1])]),
+            pad_token_id=pad_id,
+            **GENERATION_KWARGS
+        )
+
+    # Only decode the generated continuation, not the echoed prompt
+    generated = outputs[:, input_ids.shape[1]:]
+    return tokenizer.batch_decode(generated, skip_special_tokens=True), int((generated != pad_id).sum())
+
+def extract_and_validate_claims_with_phi3(text):
+    """Use the LLM to extract and validate claims directly from the text."""
+    return validate_claims_batch([text])[0]
+
+def validate_claims_batch(texts, batch_size=BATCH_SIZE, cache=None, prefilter=False, triage=None, triaged=None):
+    """Extract and validate claims for many texts with one generate call per batch.
+
+    Prompts are sorted by token length and cut into batches of similar length so
+    left padding stays small. Returns one list of (claim, status, explanation)
+    tuples per input text, in the same order as `texts`. With a ClaimCache, texts
+    validated before under the same model, prompt and settings skip the model.
+    With prefilter=True each text is first reduced by split_into_claim_chunks and
+    the claims from all of its chunks are returned together.
+    With a CheckWorthinessModel as `triage`, texts (or chunks) it scores below its
+    threshold get no claims without reaching the model. Pass a set as `triaged`
+    to collect the indices of texts that triage kept away from the model entirely.
+    """
+    if prefilter:
+        owners, chunks = [], []
+        for i, text in enumerate(texts):
+            if isinstance(text, str) and text.strip():
+                for chunk in split_into_claim_chunks(text):
+                    owners.append(i)
+                    chunks.append(chunk)
+        print(f"Pre-filter: {len(texts)} texts reduced to {len(chunks)} candidate claim chunks")
+        results = [[] for _ in texts]
+        triaged_chunks = set()
+        for i, claims in zip(owners, validate_claims_batch(chunks, batch_size=batch_size, cache=cache, triage=triage,
+                                                           triaged=triaged_chunks)):
+            results[i].extend(claims)
+        if triaged is not None and triage is not None:
+            sent = {owners[j] for j in range(len(chunks)) if j not in triaged_chunks}
+            triaged.update(i for i in set(owners) if i not in sent)
+        return results
+
+    results = [[] for _ in texts]
+    pending = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+    if triage is not None:
+        total = len(pending)
+        worthy = [i for i in pending if triage.is_check_worthy(texts[i])]
+        if triaged is not None:
+            triaged.update(set(pending) - set(worthy))
+        pending = worthy
+        print(f"Triage: {len(pending)} of {total} texts sent to the LLM")
+    if not pending:
+        return results
+
+    keys = {}
+    if cache is not None:
+        keys = {
+            i: make_cache_key(texts[i], registry.model_name, PROMPT_TEMPLATE, dict(GENERATION_KWARGS, max_length=MAX_INPUT_LENGTH, max_tokens_per_claim=MAX_TOKENS_PER_CLAIM, backend=registry.backend))
+            for i in pending
+        }
+        cached = cache.get_many(keys.values())
+        for i in pending:
+            if keys[i] in cached:
+                results[i] = cached[keys[i]]
+        pending = [i for i in pending if keys[i] not in cached]
+        print(f"Claim cache: {len(cached)} hits, {len(pending)} misses")
+        if not pending:
+            return results
+
+    bodies = dict(zip(pending, encode_prompt_bodies([texts[i] for i in pending])))
+    pending.sort(key=lambda i: len(bodies[i]))
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        start_time = time.time()
+        responses, _ = generate_responses([bodies[i] for i in batch])
+        for i, response in zip(batch, responses):
+            results[i] = parse_claims(response.strip())
+        if cache is not None:
+            cache.put_many({keys[i]: results[i] for i in batch})
+        end_time = time.time()
+        print(f"Processed batch of {len(batch)} texts in {end_time - start_time:.2f} seconds")
+
+    return results
+
+def item_id(source, url, text):
+    """Stable ID for a post or video: its URL, or a content hash when it has none."""
+    if url:
+        return url
+    return f"{source}:" + hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+def collect_items(data):
+    """Flatten topic data into the texts to validate, keeping a reference to their source."""
+    items = []
     for topic_data in data:
-        reddit_posts = topic_data.get("reddit_posts", [])
-        youtube_videos = topic_data.get("youtube_videos", [])
-
-        for post in reddit_posts:
-            selftext = post.get("selftext", "")
-            print(f"Processing Reddit post '{post.get('title', 'Untitled')}'")
-            validated_claims = extract_and_validate_claims_with_phi3(selftext)
-            print(f"Validated claims from Reddit post '{post.get('title', 'Untitled')}':")
-            for claim, status, explanation in validated_claims:
-                print(f"- Claim: {claim}")
-                print(f"  Status: {status}")
-                print(f"  Explanation: {explanation}")
-                print()
+        for post in topic_data.get("reddit_posts", []):
+            items.append({
+                "id": item_id("reddit", post.get("url"), post.get("selftext", "")),
+                "topic": topic_data.get("topic"),
+                "source": "Reddit post",
+                "title": post.get("title", "Untitled"),
+                "url": post.get("url"),
+                "text": post.get("selftext", "")
+            })
+        for video in topic_data.get("youtube_videos", []):
+            items.append({
+                "id": item_id("youtube", video.get("url"), video.get("transcript", "")),
+                "topic": topic_data.get("topic"),
+                "source": "YouTube video",
+                "title": video.get("title", "Untitled"),
+                "url": video.get("url"),
+                "text": video.get("transcript", "")
+            })
+    return items
+
+DEFAULT_RESULTS_PATH = "claim_results.jsonl"
+
+def iter_topics(file_path, chunk_size=65536):
+    """Yield the topic objects of a JSON array file one at a time.
+
+    Only the topic being decoded is held in memory, so memory use depends on
+    the largest topic rather than the size of the file.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer, pos, started = "", 0, False
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                if not started:
+                    if buffer[pos] != "[":
+                        raise ValueError(f"Expected a JSON array of topics in {file_path}")
+                    started = True
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    return
+                try:
+                    topic, end = decoder.raw_decode(buffer, pos)
+                except ValueError:
+                    pass  # Object is incomplete: read more below
+                else:
+                    yield topic
+                    pos = end
+                    continue
+            # Grow the read with the buffer so one huge topic is not re-parsed quadratically
+            chunk = f.read(max(chunk_size, len(buffer) - pos))
+            if not chunk:
+                raise ValueError(f"Unexpected end of JSON in {file_path}")
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+def analyze_json_stream(file_path, results_path=DEFAULT_RESULTS_PATH, batch_size=BATCH_SIZE,
+                        cache_path=DEFAULT_CACHE_PATH, prefilter=False, buffer_batches=4, dedupe=True,
+                        triage_path=DEFAULT_TRIAGE_MODEL_PATH, triage_threshold=None):
+    """Validate claims topic by topic, yielding one result per Reddit post or YouTube video.
 
-        for video in youtube_videos:
-            transcript = video.get("transcript", "")
-            print(f"Processing YouTube video '{video.get('title', 'Untitled')}'")
-            validated_claims = extract_and_validate_claims_with_phi3(transcript)
-            print(f"Validated claims from YouTube video '{video.get('title', 'Untitled')}':")
-            for claim, status, explanation in validated_claims:
-                print(f"- Claim: {claim}")
-                print(f"  Status: {status}")
-                print(f"  Explanation: {explanation}")
+    Up to `buffer_batches` batches of items are buffered so validate_claims_batch
+    can still bucket them by length. Each result is appended to `results_path`
+    as one JSON line as soon as it is ready (results_path=None disables this).
+    With dedupe=True, near-copies of a text already seen in the file reuse its claims.
+    The near-duplicate index is built as the file is streamed, not while scraping,
+    and keeps a bounded number of clusters so memory stays flat on large files.
+    If a triage model has been trained to `triage_path` (see train_triage.py),
+    texts it scores below its threshold (or `triage_threshold`) skip the LLM.
+    """
+    cache = ClaimCache(cache_path) if cache_path else None
+    dedupe_index = NearDuplicateIndex() if dedupe else None
+    triage = load_triage_model(triage_path, triage_threshold)
+    results_file = open(results_path, 'a', encoding='utf-8') if results_path else None
+    window = batch_size * buffer_batches
+    try:
+        pending = []
+        for topic_data in iter_topics(file_path):
+            pending.extend(collect_items([topic_data]))
+            while len(pending) >= window:
+                yield from validate_items(pending[:window], batch_size, cache, prefilter, results_file, dedupe_index, triage)
+                pending = pending[window:]
+        if pending:
+            yield from validate_items(pending, batch_size, cache, prefilter, results_file, dedupe_index, triage)
+    finally:
+        if results_file is not None:
+            results_file.close()
+        if cache is not None:
+            cache.close()
+
+def validate_items(items, batch_size=BATCH_SIZE, cache=None, prefilter=False, results_file=None, dedupe=None, triage=None):
+    """Validate collected items and yield one result dict per item, optionally appending it to results_file.
+
+    With a NearDuplicateIndex as `dedupe`, only one representative per cluster
+    of near-identical texts is validated; the other members get its claims and
+    a "duplicate_of" field naming it. Items whose text the triage model kept
+    away from the LLM are marked "triaged": true, so their empty claims are not
+    mistaken for LLM verdicts.
+    """
+    if dedupe is None:
+        representatives = [None] * len(items)
+        triaged = set()
+        claims = validate_claims_batch([item["text"] for item in items], batch_size=batch_size, cache=cache,
+                                       prefilter=prefilter, triage=triage, triaged=triaged)
+        batch_results = [(item_claims, i in triaged) for i, item_claims in enumerate(claims)]
+    else:
+        representatives = [
+            dedupe.add(item["id"], item["text"]) if isinstance(item["text"], str) else item["id"]
+            for item in items
+        ]
+        known = {}  # Representatives validated before -> their result
+        texts = {}  # Representatives not validated yet -> their text
+        for item, representative in zip(items, representatives):
+            if representative in known or representative in texts:
+                continue
+            if representative in dedupe.results:
+                known[representative] = dedupe.results[representative]
+            else:
+                texts[representative] = item["text"]
+        print(f"Near-duplicates: {len(items)} items collapsed to {len(texts)} new texts to validate")
+        triaged = set()
+        claims = validate_claims_batch(list(texts.values()), batch_size=batch_size, cache=cache,
+                                       prefilter=prefilter, triage=triage, triaged=triaged)
+        for i, (representative, representative_claims) in enumerate(zip(texts, claims)):
+            known[representative] = (representative_claims, i in triaged)
+            dedupe.set_result(representative, known[representative])
+        batch_results = [known[representative] for representative in representatives]
+    for item, representative, (validated_claims, skipped) in zip(items, representatives, batch_results):
+        result = {
+            "id": item["id"],
+            "topic": item["topic"],
+            "source": item["source"],
+            "title": item["title"],
+            "url": item["url"],
+            "claims": [
+                {"claim": claim, "status": status, "explanation": explanation}
+                for claim, status, explanation in validated_claims
+            ]
+        }
+        if representative is not None and representative != item["id"]:
+            result["duplicate_of"] = representative
+        if skipped:
+            result["triaged"] = True
+        if results_file is not None:
+            results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            results_file.flush()
+        yield result
+
+# Update the analyze_json function to use the new approach
+def analyze_json(file_path, batch_size=BATCH_SIZE, cache_path=DEFAULT_CACHE_PATH, prefilter=False,
+                 results_path=DEFAULT_RESULTS_PATH, dedupe=True, triage_path=DEFAULT_TRIAGE_MODEL_PATH):
+    """Analyze JSON data to extract and validate claims.
+
+    Results are cached in `cache_path`; pass cache_path=None to always re-validate.
+    prefilter=True sends only spaCy-selected claim sentences to the LLM.
+    dedupe=True validates one text per cluster of near-duplicates.
+    A trained triage model at `triage_path` keeps texts without claims away from the LLM.
+    Returns every (claim, status, explanation) tuple found; use analyze_json_stream
+    to consume results as they are produced.
+    """
+    print(f"Attempting to load JSON file: {file_path}")
+    all_claims = []
+    try:
+        for result in analyze_json_stream(file_path, results_path=results_path, batch_size=batch_size,
+                                          cache_path=cache_path, prefilter=prefilter, dedupe=dedupe,
+                                          triage_path=triage_path):
+            print(f"Validated claims from {result['source']} '{result['title']}':")
+            for entry in result["claims"]:
+                print(f"- Claim: {entry['claim']}")
+                print(f"  Status: {entry['status']}")
+                print(f"  Explanation: {entry['explanation']}")
                 print()
+                all_claims.append((entry["claim"], entry["status"], entry["explanation"]))
+    except Exception as e:
+        print(f"Error analyzing JSON: {str(e)}")
+    return all_claims
 
 # Entry point
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import argparse
+import multiprocessing
+import resource
+import time
+
+import torch
+
+import analysis
+from analysis import BACKENDS, BATCH_SIZE, collect_items, encode_prompt_bodies, generate_responses, iter_topics, parse_claims
+
+def load_texts(file_path, limit=None):
+    texts = []
+    for topic_data in iter_topics(file_path):
+        texts.extend(item["text"] for item in collect_items([topic_data]) if item["text"].strip())
+        if limit and len(texts) >= limit:
+            return texts[:limit]
+    return texts
+
+def _run_backend(backend, file_path, limit, batch_size, queue):
+    """Benchmark one backend in its own process so peak RSS is not shared between backends."""
+    try:
+        torch.manual_seed(0)
+        analysis.registry.set_backend(backend)
+        texts = load_texts(file_path, limit)
+        start_time = time.time()
+        analysis.registry.get_llm()
+        analysis.registry.get_prefix_cache(analysis.PROMPT_PREFIX)
+        load_seconds = time.time() - start_time
+
+        generated_tokens = 0
+        verdicts = {"True": 0, "False": 0, "Other": 0}
+        start_time = time.time()
+        for start in range(0, len(texts), batch_size):
+            responses, token_count = generate_responses(encode_prompt_bodies(texts[start:start + batch_size]))
+            generated_tokens += token_count
+            for response in responses:
+                for _, status, _ in parse_claims(response.strip()):
+                    verdicts[status if status in verdicts else "Other"] += 1
+        generate_seconds = time.time() - start_time
+
+        queue.put({
+            "backend": backend,
+            "texts": len(texts),
+            "load_seconds": load_seconds,
+            "tokens_per_second": generated_tokens / generate_seconds if generate_seconds else 0.0,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # ru_maxrss is KiB on Linux
+            "verdicts": verdicts
+        })
+    except Exception as e:
+        queue.put({"backend": backend, "error": str(e)})
+
+def benchmark(file_path, backends, limit=None, batch_size=BATCH_SIZE):
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in backends:
+        queue = context.Queue()
+        process = context.Process(target=_run_backend, args=(backend, file_path, limit, batch_size, queue))
+        process.start()
+        process.join()
+        if queue.empty():
+            # Killed (e.g. out of memory) before it could report
+            results.append({"backend": backend, "error": f"process exited with code {process.exitcode}"})
+        else:
+            results.append(queue.get())
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Phi-3 inference backends on a scraped JSON file")
+    parser.add_argument("file_path", nargs="?", default="trending_topics_info.json")
+    parser.add_argument("--backends", nargs="+", default=[b for b in BACKENDS if not b.startswith("cuda") or torch.cuda.is_available()])
+    parser.add_argument("--limit", type=int, default=None, help="Only benchmark the first N texts")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'texts':>5} {'load s':>8} {'tok/s':>8} {'peak RSS MB':>12}  verdicts")
+    for result in benchmark(args.file_path, args.backends, args.limit, args.batch_size):
+        if "error" in result:
+            print(f"{result['backend']:<10} failed: {result['error']}")
+            continue
+        verdicts = ", ".join(f"{k}={v}" for k, v in result["verdicts"].items())
+        print(f"{result['backend']:<10} {result['texts']:>5} {result['load_seconds']:>8.1f} "
+              f"{result['tokens_per_second']:>8.2f} {result['peak_rss_mb']:>12.0f}  {verdicts}")
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from threading import Lock
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "claim_cache.sqlite3"
+
+def make_cache_key(text, model_name, prompt_template, generation_kwargs):
+    """Content-addressed key: any change to the text, model, prompt or generation settings is a miss."""
+    payload = json.dumps({
+        "text": text,
+        "model": model_name,
+        "prompt": prompt_template,
+        "generation": generation_kwargs
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ClaimCache:
+    """On-disk SQLite cache of parsed (claim, status, explanation) tuples.
+
+    Entries are evicted by age (`max_age_days`) and by count (`max_entries`,
+    least recently used first). Either limit can be None to disable it.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=50000, max_age_days=30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.lock = Lock()
+        # Worker processes may share one cache file, so wait on SQLite's lock rather than failing
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS claims ("
+                "key TEXT PRIMARY KEY, "
+                "claims TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS claims_accessed_at ON claims (accessed_at)")
+        self.evict()
+
+    def get_many(self, keys):
+        """Return {key: [(claim, status, explanation), ...]} for the keys that are cached."""
+        keys = list(set(keys))
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self.lock, self.conn:
+            for start in range(0, len(keys), 500):  # Stay under SQLite's bound-parameter limit
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT key, claims FROM claims WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, claims in rows:
+                    found[key] = [tuple(claim) for claim in json.loads(claims)]
+                self.conn.execute(
+                    f"UPDATE claims SET accessed_at = ? WHERE key IN ({placeholders})", [now] + chunk
+                )
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, entries):
+        """Store {key: [(claim, status, explanation), ...]}."""
+        if not entries:
+            return
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO claims (key, claims, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, json.dumps(claims, ensure_ascii=False), now, now) for key, claims in entries.items()]
+            )
+        self.evict()
+
+    def put(self, key, claims):
+        self.put_many({key: claims})
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_entries."""
+        removed = 0
+        with self.lock, self.conn:
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self.conn.execute("DELETE FROM claims WHERE created_at < ?", (cutoff,)).rowcount
+            if self.max_entries is not None:
+                removed += self.conn.execute(
+                    "DELETE FROM claims WHERE key IN ("
+                    "SELECT key FROM claims ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+        if removed:
+            logger.info(f"Evicted {removed} entries from claim cache {self.path}")
+        return removed
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
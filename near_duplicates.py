@@ -0,0 +1,131 @@
+import hashlib
+import re
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Jaccard similarity of word shingles above which two texts count as copies of each other
+DEFAULT_THRESHOLD = 0.8
+NUM_PERM = 128
+# 16 bands of 8 rows: texts around the threshold collide in at least one band with high probability
+NUM_BANDS = 16
+SHINGLE_SIZE = 5
+# Clusters kept before the least recently matched ones are forgotten
+DEFAULT_CAPACITY = 50000
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+def shingles(text, size=SHINGLE_SIZE):
+    """The set of `size`-word shingles of a text, lowercased and ignoring punctuation."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+class NearDuplicateIndex:
+    """Incremental MinHash/LSH index that maps each text to its cluster representative.
+
+    Texts are added one at a time. A text whose shingles overlap an indexed text
+    by at least `threshold` (estimated from MinHash signatures) joins that
+    text's cluster; otherwise it becomes the representative of a new cluster.
+    LSH banding only compares a text against the few indexed texts that share
+    a band with it, so adding stays cheap as the index grows. Texts with the
+    same normalised words are matched exactly without hashing.
+
+    Memory is bounded: only cluster representatives are kept (a signature and
+    a result each, not one entry per added text), and beyond `capacity`
+    clusters the least recently matched one is dropped. A later copy of a
+    dropped cluster starts a new one and is validated again.
+    """
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, num_bands=NUM_BANDS,
+                 shingle_size=SHINGLE_SIZE, seed=1, capacity=DEFAULT_CAPACITY):
+        if num_perm % num_bands:
+            raise ValueError("num_perm must be a multiple of num_bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.num_bands = num_bands
+        self.rows = num_perm // num_bands
+        self.shingle_size = shingle_size
+        self.capacity = capacity
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, 1 << 61, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, 1 << 61, size=num_perm, dtype=np.uint64)
+        self.bands = [{} for _ in range(num_bands)]  # band hash -> keys of representatives
+        self.signatures = OrderedDict()  # representative key -> signature, least recently matched first
+        self.exact = OrderedDict()  # digest of normalised words -> representative key, least recently used first
+        self.results = {}  # representative key -> result computed for it, to fan out to its cluster
+        self.added = 0
+
+    def signature(self, text):
+        hashes = np.array(
+            [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text, self.shingle_size)],
+            dtype=np.uint64
+        )
+        if not len(hashes):
+            return None
+        # Unsigned overflow wraps, which is fine for hashing
+        with np.errstate(over="ignore"):
+            permuted = np.bitwise_and((np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME, _MAX_HASH)
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.num_bands)]
+
+    def add(self, key, text):
+        """Index text under key and return the key of its cluster's representative (key itself if new)."""
+        self.added += 1
+        words = WORD_PATTERN.findall(text.lower())
+        if not words:
+            # Nothing to compare; empty texts are not clustered together
+            return key
+        digest = hashlib.sha1(" ".join(words).encode("utf-8")).digest()
+        representative = self.exact.get(digest)
+        if representative is not None and representative not in self.signatures:
+            representative = None  # Its cluster was dropped
+        if representative is None:
+            signature = self.signature(text)
+            band_keys = self._band_keys(signature)
+            candidates = dict.fromkeys(
+                candidate for band, band_key in zip(self.bands, band_keys) for candidate in band.get(band_key, ())
+            )
+            representative = next((
+                candidate for candidate in candidates
+                if np.mean(self.signatures[candidate] == signature) >= self.threshold
+            ), None)
+            if representative is None:
+                representative = key
+                self.signatures[key] = signature
+                for band, band_key in zip(self.bands, band_keys):
+                    band.setdefault(band_key, []).append(key)
+        self.signatures.move_to_end(representative)
+        self.exact[digest] = representative
+        self.exact.move_to_end(digest)
+        while len(self.signatures) > self.capacity:
+            self._drop(next(iter(self.signatures)))
+        while len(self.exact) > self.capacity:
+            self.exact.popitem(last=False)
+        return representative
+
+    def _drop(self, representative):
+        signature = self.signatures.pop(representative)
+        for band, band_key in zip(self.bands, self._band_keys(signature)):
+            keys = band[band_key]
+            keys.remove(representative)
+            if not keys:
+                del band[band_key]
+        self.results.pop(representative, None)
+
+    def set_result(self, representative, result):
+        """Keep result for fanning out to later members of the cluster, while the cluster is indexed."""
+        if representative in self.signatures:
+            self.results[representative] = result
+
+    def __len__(self):
+        return self.added
+
+    def cluster_count(self):
+        return len(self.signatures)
@@ -0,0 +1,162 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import torch
+
+import analysis
+from analysis import BACKENDS, BATCH_SIZE, DEFAULT_RESULTS_PATH, collect_items, iter_topics, validate_items
+from claim_cache import ClaimCache, DEFAULT_CACHE_PATH
+from near_duplicates import NearDuplicateIndex
+from triage import DEFAULT_TRIAGE_MODEL_PATH, load_triage_model
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = "claim_results.checkpoint"
+
+class Checkpoint:
+    """Append-only record of completed item IDs, one per line."""
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, item_id):
+        return item_id in self.done
+
+    def mark(self, item_ids):
+        for item_id in item_ids:
+            self.file.write(item_id + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.done.update(item_ids)
+
+    def close(self):
+        self.file.close()
+
+def checkpoint_key(item):
+    # The same video can be listed under several topics; each listing is its own unit of work
+    return f"{item['topic']}\t{item['id']}"
+
+# Per-process state, set up by _init_worker in each worker
+_worker_cache = None
+_worker_options = {}
+
+def _init_worker(num_threads, cache_path, batch_size, prefilter, backend, dedupe, triage_path, triage_threshold):
+    global _worker_cache, _worker_options
+    # Each worker gets its own slice of the cores instead of every process fighting for all of them
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    _worker_cache = ClaimCache(cache_path) if cache_path else None
+    # Each worker collapses the near-duplicates among its own shards
+    _worker_options = {
+        "batch_size": batch_size,
+        "prefilter": prefilter,
+        "dedupe": NearDuplicateIndex() if dedupe else None,
+        "triage": load_triage_model(triage_path, triage_threshold)
+    }
+    if backend:
+        analysis.registry.set_backend(backend)
+    analysis.registry.warm_up(nlp=prefilter)
+
+def _analyze_shard(items):
+    return list(validate_items(items, cache=_worker_cache, **_worker_options))
+
+def _iter_shards(file_path, checkpoint, shard_size):
+    shard = []
+    skipped = 0
+    for topic_data in iter_topics(file_path):
+        for item in collect_items([topic_data]):
+            if checkpoint_key(item) in checkpoint:
+                skipped += 1
+                continue
+            shard.append(item)
+            if len(shard) >= shard_size:
+                yield shard
+                shard = []
+    if shard:
+        yield shard
+    if skipped:
+        logger.info(f"Resumed: skipped {skipped} items already in the checkpoint")
+
+def run_sharded(file_path, num_workers=None, results_path=DEFAULT_RESULTS_PATH,
+                checkpoint_path=DEFAULT_CHECKPOINT_PATH, batch_size=BATCH_SIZE,
+                cache_path=DEFAULT_CACHE_PATH, prefilter=False, shard_batches=2, backend=None, dedupe=True,
+                triage_path=DEFAULT_TRIAGE_MODEL_PATH, triage_threshold=None):
+    """Validate every post and transcript in `file_path` across worker processes.
+
+    Items are cut into shards of `shard_batches` batches and handed to the next
+    free worker; each worker loads its own model and uses an even share of the
+    CPU threads. Completed item IDs are checkpointed after their results are
+    written, so a rerun with the same paths resumes where the last one stopped.
+    Yields result dicts as shards complete.
+    """
+    num_workers = num_workers or max(1, (os.cpu_count() or 1) // 8)
+    num_threads = max(1, (os.cpu_count() or 1) // num_workers)
+    checkpoint = Checkpoint(checkpoint_path)
+    results_file = open(results_path, 'a', encoding='utf-8')
+    shards = _iter_shards(file_path, checkpoint, batch_size * shard_batches)
+    logger.info(f"Starting {num_workers} workers with {num_threads} threads each")
+    try:
+        # spawn: forking a process that has initialised torch threads is unsafe
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(num_threads, cache_path, batch_size, prefilter, backend, dedupe, triage_path, triage_threshold)
+        ) as executor:
+            in_flight = set()
+            exhausted = False
+            while in_flight or not exhausted:
+                # Keep every worker busy plus one queued shard each, without reading the whole file ahead
+                while not exhausted and len(in_flight) < num_workers * 2:
+                    shard = next(shards, None)
+                    if shard is None:
+                        exhausted = True
+                    else:
+                        in_flight.add(executor.submit(_analyze_shard, shard))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results = future.result()
+                    for result in results:
+                        results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    results_file.flush()
+                    checkpoint.mark([checkpoint_key(result) for result in results])
+                    yield from results
+    finally:
+        results_file.close()
+        checkpoint.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded, resumable claim analysis")
+    parser.add_argument("file_path", nargs="?", default="trending_topics_info.json")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH)
+    parser.add_argument("--prefilter", action="store_true")
+    parser.add_argument("--no-dedupe", dest="dedupe", action="store_false", help="Validate near-duplicate texts separately")
+    parser.add_argument("--triage-model", default=DEFAULT_TRIAGE_MODEL_PATH, help="Trained triage model; skipped if missing")
+    parser.add_argument("--triage-threshold", type=float, default=None)
+    parser.add_argument("--backend", choices=["auto"] + list(BACKENDS), default=None)
+    args = parser.parse_args()
+
+    completed = 0
+    for result in run_sharded(args.file_path, num_workers=args.workers, results_path=args.results,
+                              checkpoint_path=args.checkpoint, batch_size=args.batch_size,
+                              prefilter=args.prefilter, backend=args.backend, dedupe=args.dedupe,
+                              triage_path=args.triage_model, triage_threshold=args.triage_threshold):
+        completed += 1
+        logger.info(f"[{completed}] {len(result['claims'])} claims from {result['source']} '{result['title']}'")
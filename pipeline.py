@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+
+from app import YouTubeScraper
+from reddit import RedditScraper
+from run_cache import RunCache
+from topic_store import TopicStore
+from topics import BurstDetector, TopicEngine
+from watermarks import WatermarkStore
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Scraper calls allowed in flight per source. Each call already parallelises internally.
+REDDIT_CONCURRENCY = 2
+YOUTUBE_CONCURRENCY = 3
+
+# YouTube trending terms kept; the second phase searches YouTube for at most this many of them
+YOUTUBE_TOP_TOPICS = 10
+
+# The old single-file layout the analysis reads
+DEFAULT_EXPORT_PATH = "trending_topics_info.json"
+
+# YouTube time frames offered by the apps, in days
+TIME_FRAME_DAYS = {"Last 1 month": 30, "Last 3 months": 90, "Last 6 months": 180, "Last 1 year": 365}
+
+def published_after_for(time_frame):
+    """YouTube publishedAfter for one of TIME_FRAME_DAYS (default: a year back)."""
+    return (datetime.now() - timedelta(days=TIME_FRAME_DAYS.get(time_frame, 365))).isoformat() + "Z"
+
+def find_common_topics(reddit_topics, youtube_topics):
+    """Find common trending topics between Reddit and YouTube."""
+    return list(set(reddit_topics).intersection(set(youtube_topics)))
+
+EVENT_LABELS = {
+    "subreddits": "Subreddits Found:",
+    "reddit_topics": "Reddit Trending Topics:",
+    "youtube_topics": "YouTube Trending Topics:",
+    "common_topics": "Common Trending Topics:",
+    "rising_topics": "Rising Topics:"
+}
+
+def describe_event(name, value):
+    """Arguments for st.write (or print) describing a collection event."""
+    return (EVENT_LABELS[name], value) if name in EVENT_LABELS else (value,)
+
+class CollectionEngine:
+    """Runs the Reddit and YouTube collection for a set of topics concurrently.
+
+    The scrapers are blocking, so every call runs in a worker thread. A
+    semaphore per source caps how many calls of that source are in flight.
+    Reddit and YouTube proceed independently and only meet to compute the
+    common topics, so wall time tracks the slower source instead of their sum.
+    `on_event(name, value)` is called on the event loop thread as each result
+    becomes available, e.g. to render progress in Streamlit.
+
+    Trending terms are counted by `topic_engine` as posts and videos arrive,
+    under the sources "reddit" and "youtube". Pass a long-lived engine (e.g.
+    one with bigrams or a SpaceSaving capacity) to keep counting across runs.
+    `burst_detector` gets the same items by timestamp and reports the terms
+    rising in its latest window. With a TopicStore as `store`, each topic is
+    appended to it as soon as its posts and videos are in, and only then are
+    they marked as seen for incremental scraping.
+    """
+    def __init__(self, reddit_scraper, youtube_scraper, on_event=None,
+                 reddit_concurrency=REDDIT_CONCURRENCY, youtube_concurrency=YOUTUBE_CONCURRENCY,
+                 topic_engine=None, topic_weighting="count", burst_detector=None, store=None):
+        self.reddit_scraper = reddit_scraper
+        self.youtube_scraper = youtube_scraper
+        self.topic_engine = topic_engine or TopicEngine()
+        self.topic_weighting = topic_weighting
+        self.burst_detector = burst_detector or BurstDetector()
+        self.store = store
+        self.on_event = on_event or (lambda name, value: None)
+        # A sequential RedditScraper shares one PRAW client, which must stay on one thread at a time
+        if getattr(reddit_scraper, "max_workers", 1) <= 1:
+            reddit_concurrency = 1
+        self.reddit_concurrency = reddit_concurrency
+        self.youtube_concurrency = youtube_concurrency
+
+    async def _call(self, semaphore, fn, *args, **kwargs):
+        async with semaphore:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def collect(self, topics, published_after, subreddit_limit=10, posts_per_sub=15, videos_per_topic=10):
+        """Collect trending topic info; returns the list of {"topic", "reddit_posts", "youtube_videos"} dicts."""
+        self.reddit_semaphore = asyncio.Semaphore(self.reddit_concurrency)
+        self.youtube_semaphore = asyncio.Semaphore(self.youtube_concurrency)
+
+        (subreddits, reddit_topics), youtube_topics = await asyncio.gather(
+            self._collect_reddit(topics, subreddit_limit, posts_per_sub),
+            self._collect_youtube(topics, published_after, videos_per_topic)
+        )
+
+        self.burst_detector.advance(time.time())
+        self.on_event("rising_topics", self.burst_detector.top_rising(10))
+
+        # Find common topics
+        common_topics = find_common_topics(reddit_topics, youtube_topics)
+        self.on_event("common_topics", common_topics)
+
+        # Gather info for topics: (topic, search Reddit, search YouTube)
+        if common_topics:
+            # Case 1: Common topics exist
+            plan = [(topic, True, bool(youtube_topics)) for topic in common_topics]  # Only try YouTube if we have data
+        else:
+            # Case 2: No common topics or YouTube failed
+            self.on_event("fallback", "No common trending topics found or YouTube data unavailable. Gathering top 5 trending topics.")
+            plan = [(topic, True, False) for topic in reddit_topics[:5]] + \
+                   [(topic, False, True) for topic in youtube_topics[:5]]  # Empty if YouTube failed
+
+        # Each topic is stored as soon as its own posts and videos are in
+        return list(await asyncio.gather(*[
+            self._gather_topic(topic, with_reddit, with_youtube, subreddits, posts_per_sub, videos_per_topic, published_after)
+            for topic, with_reddit, with_youtube in plan
+        ]))
+
+    async def _gather_topic(self, topic, with_reddit, with_youtube, subreddits, posts_per_sub, videos_per_topic,
+                            published_after):
+        async def no_items():
+            return []
+
+        reddit_posts, youtube_videos = await asyncio.gather(
+            self._call(self.reddit_semaphore, self.reddit_scraper.gather_posts_for_topic, topic, subreddits,
+                       limit=posts_per_sub) if with_reddit else no_items(),
+            self._call(self.youtube_semaphore, self.youtube_scraper.fetch_youtube_videos, topic,
+                       max_results=videos_per_topic, published_after=published_after) if with_youtube else no_items()
+        )
+        topic_data = {"topic": topic, "reddit_posts": reddit_posts, "youtube_videos": youtube_videos}
+        if self.store is not None:
+            # Written from a worker thread so a slow disk does not stall the event loop
+            await asyncio.to_thread(self._store_topic, topic_data)
+        return topic_data
+
+    def _store_topic(self, topic_data):
+        self.store.append_topic(topic_data)
+        for scraper, field in ((self.reddit_scraper, "reddit_posts"), (self.youtube_scraper, "youtube_videos")):
+            mark_stored = getattr(scraper, "mark_stored", None)
+            if mark_stored is not None:
+                mark_stored(topic_data["topic"], topic_data[field])
+
+    async def _collect_reddit(self, topics, subreddit_limit, posts_per_sub):
+        results = await asyncio.gather(*[
+            self._call(self.reddit_semaphore, self.reddit_scraper.search_political_subreddits, topic, limit=subreddit_limit)
+            for topic in topics
+        ])
+        all_subreddits = set()
+        for subreddits in results:
+            all_subreddits.update(subreddits)
+        subreddits = list(all_subreddits)
+        self.on_event("subreddits", subreddits)
+
+        reddit_posts = await self._call(self.reddit_semaphore, self.reddit_scraper.fetch_reddit_posts, subreddits, limit_per_sub=posts_per_sub)
+        self.topic_engine.add_many(reddit_posts, source="reddit")
+        self.burst_detector.add_many(reddit_posts, source="reddit")
+        reddit_topics = self.topic_engine.top(15, source="reddit", weighting=self.topic_weighting)
+        self.on_event("reddit_topics", reddit_topics)
+        return subreddits, reddit_topics
+
+    async def _collect_youtube(self, topics, published_after, videos_per_topic):
+        """Returns the YouTube trending topics, or [] when the YouTube phase failed (e.g. on quota)."""
+        try:
+            # Budget both phases: a search per requested topic now, and per trending topic afterwards
+            await asyncio.to_thread(self.youtube_scraper.ensure_quota_for, len(topics) + YOUTUBE_TOP_TOPICS)
+            results = await asyncio.gather(*[
+                self._call(self.youtube_semaphore, self.youtube_scraper.fetch_youtube_videos, topic,
+                           max_results=videos_per_topic, published_after=published_after)
+                for topic in topics
+            ])
+            for videos in results:
+                # Counted in topic order, so ties rank the same whichever search finished first
+                self.topic_engine.add_many(videos, source="youtube")
+                self.burst_detector.add_many(videos, source="youtube")
+            youtube_topics = self.topic_engine.top(YOUTUBE_TOP_TOPICS, source="youtube", weighting=self.topic_weighting)
+            self.on_event("youtube_topics", youtube_topics)
+            return youtube_topics
+        except Exception as e:
+            logger.error(f"Error fetching YouTube data: {str(e)}")
+            self.on_event("youtube_error", "YouTube API quota exhausted or error occurred. Proceeding with Reddit data only.")
+            return []
+
+def collect_trending_topics(topics, published_after, reddit_scraper, youtube_scraper, on_event=None, store=None,
+                            **kwargs):
+    """Blocking entry point for scripts (e.g. Streamlit) that are not already inside an event loop."""
+    engine = CollectionEngine(reddit_scraper, youtube_scraper, on_event=on_event, store=store)
+    return asyncio.run(engine.collect(topics, published_after, **kwargs))
+
+def run_search(topics, published_after, incremental=False, on_event=None, export_path=DEFAULT_EXPORT_PATH,
+               reddit_workers=4):
+    """One search from start to finish, as run by the apps.
+
+    Builds the run cache, both scrapers and the topic store (plus a
+    WatermarkStore when `incremental`, so posts and videos stored unchanged
+    by earlier searches are skipped), collects, exports the run to
+    `export_path` in the legacy layout and shuts everything down.
+    Returns the collected topic info.
+    """
+    with ExitStack() as stack:
+        # One cache per search, so a post or video seen in several phases is fetched once
+        run_cache = RunCache()
+        watermarks = None
+        if incremental:
+            watermarks = WatermarkStore()
+            stack.callback(watermarks.close)
+        reddit_scraper = RedditScraper(max_workers=reddit_workers, run_cache=run_cache, watermarks=watermarks)
+        stack.callback(reddit_scraper.close)
+        youtube_scraper = YouTubeScraper(run_cache=run_cache, watermarks=watermarks)
+        stack.callback(youtube_scraper.close)
+        # Each topic is appended to the store as it completes, so a crash keeps what was gathered
+        store = TopicStore()
+        stack.callback(store.close)
+
+        topics_info = collect_trending_topics(
+            topics, published_after, reddit_scraper, youtube_scraper, on_event=on_event, store=store
+        )
+        run_cache.log_stats()
+        store.export_legacy(export_path)
+        return topics_info
@@ -0,0 +1,98 @@
+import logging
+import sqlite3
+from datetime import datetime
+from threading import Lock
+from zoneinfo import ZoneInfo
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = "youtube_quota.sqlite3"
+
+# YouTube Data API quotas reset at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+class QuotaExceeded(Exception):
+    """Raised when no key, or not enough combined quota, is left for the requested work."""
+
+def quota_day(now=None):
+    """The Pacific-time date that a quota unit spent at `now` counts against."""
+    return (now or datetime.now(QUOTA_TIMEZONE)).astimezone(QUOTA_TIMEZONE).date().isoformat()
+
+class QuotaLedger:
+    """Quota units used per API key and quota day, persisted in SQLite.
+
+    Every process and thread using the same file shares one view of usage, so
+    Streamlit reruns, restarts and parallel workers no longer start from zero.
+    reserve() picks a key, checks its quota and adds the units in one
+    BEGIN IMMEDIATE transaction, so SQLite's write lock keeps two processes
+    from both spending the last units of the same key.
+    """
+    def __init__(self, keys, daily_quota, path=DEFAULT_LEDGER_PATH):
+        self.keys = list(keys)
+        self.daily_quota = daily_quota
+        self.path = path
+        self.lock = Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS quota_usage ("
+                "day TEXT NOT NULL, "
+                "api_key TEXT NOT NULL, "
+                "used INTEGER NOT NULL, "
+                "PRIMARY KEY (day, api_key))"
+            )
+
+    def usage(self):
+        """Return {key: units used today} for every configured key."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT api_key, used FROM quota_usage WHERE day = ?", (quota_day(),)
+            ).fetchall()
+        used = dict(rows)
+        return {key: used.get(key, 0) for key in self.keys}
+
+    def remaining(self):
+        """Total units left today across all keys."""
+        return sum(max(0, self.daily_quota - used) for used in self.usage().values())
+
+    def reserve(self, units=1):
+        """Charge units to the key with the most quota left and return (key, its new total for today).
+
+        Picking the least-loaded key spreads load evenly instead of draining key 1 first.
+        Raises QuotaExceeded, reserving nothing, if no key has `units` left.
+        """
+        day = quota_day()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")  # Take the write lock before reading usage
+            try:
+                used = dict(self.conn.execute(
+                    "SELECT api_key, used FROM quota_usage WHERE day = ?", (day,)
+                ).fetchall())
+                key = min(self.keys, key=lambda k: used.get(k, 0))
+                total = used.get(key, 0) + units
+                if total > self.daily_quota:
+                    raise QuotaExceeded("All API keys have exceeded their quota limit for today")
+                self.conn.execute(
+                    "INSERT INTO quota_usage (day, api_key, used) VALUES (?, ?, ?) "
+                    "ON CONFLICT (day, api_key) DO UPDATE SET used = used + excluded.used",
+                    (day, key, units)
+                )
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+        return key, total
+
+    def ensure_budget(self, estimated_units):
+        """Reject work up front when its estimated cost exceeds today's remaining quota."""
+        remaining = self.remaining()
+        if estimated_units > remaining:
+            raise QuotaExceeded(
+                f"Estimated cost of {estimated_units} units exceeds the {remaining} units left today"
+            )
+        return remaining
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
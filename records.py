@@ -0,0 +1,231 @@
+from array import array
+from datetime import datetime, timezone
+
+# published_at encodings a CommentTable can rebuild exactly from its float column
+_FLOAT, _INT, _ISO, _RAW = 0, 1, 2, 3
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"  # YouTube's publishedAt
+
+def _encode_time(value):
+    """(kind, epoch seconds) for a published_at value, or (_RAW, nan) if it cannot be rebuilt from a float."""
+    if isinstance(value, float):
+        return _FLOAT, value
+    if isinstance(value, int) and not isinstance(value, bool):
+        return _INT, float(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.strptime(value, ISO_FORMAT).replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+        else:
+            if parsed.strftime(ISO_FORMAT) == value:
+                return _ISO, parsed.timestamp()
+    return _RAW, float("nan")
+
+def _decode_time(kind, seconds):
+    if kind == _FLOAT:
+        return seconds
+    if kind == _INT:
+        return int(seconds)
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime(ISO_FORMAT)
+
+class CommentTable:
+    """Columnar store for a post's or video's comments and their replies.
+
+    One row per comment; `parents` holds the row of the comment a reply belongs
+    to (-1 for top-level comments). Likes and publish times live in typed
+    arrays and author names are interned, so a large comment tree costs a few
+    bytes per row plus its text instead of a dict per comment. The arrays
+    support the buffer protocol, e.g. numpy.frombuffer(table.likes, dtype="int64")
+    for vectorised engagement statistics. Values that the typed columns cannot
+    reproduce exactly are kept as-is in `overrides`, so to_tree() always returns
+    the layout that was stored.
+    """
+    __slots__ = ("parents", "likes", "published", "time_kinds", "author_ids", "authors", "_author_index", "texts",
+                 "overrides")
+
+    def __init__(self):
+        self.parents = array("i")
+        self.likes = array("q")
+        self.published = array("d")  # Epoch seconds
+        self.time_kinds = array("b")
+        self.author_ids = array("I")
+        self.authors = []
+        self._author_index = {}
+        self.texts = []
+        self.overrides = {}  # (row, field) -> original value
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, author, comment, published_at, likes, parent=-1):
+        """Append one comment (or a reply to row `parent`) and return its row."""
+        row = len(self.texts)
+        author_id = self._author_index.get(author)
+        if author_id is None:
+            author_id = self._author_index[author] = len(self.authors)
+            self.authors.append(author)
+        self.author_ids.append(author_id)
+        self.texts.append(comment)
+        self.parents.append(parent)
+        kind, seconds = _encode_time(published_at)
+        self.time_kinds.append(kind)
+        self.published.append(seconds)
+        if kind == _RAW:
+            self.overrides[(row, "published_at")] = published_at
+        if isinstance(likes, int) and not isinstance(likes, bool) and -2 ** 63 <= likes < 2 ** 63:
+            self.likes.append(likes)
+        else:
+            self.likes.append(0)
+            self.overrides[(row, "likes")] = likes
+        return row
+
+    def row(self, row):
+        """The comment at row as a {"author", "comment", "published_at", "likes"} dict."""
+        return {
+            "author": self.authors[self.author_ids[row]],
+            "comment": self.texts[row],
+            "published_at": self.overrides.get((row, "published_at"))
+            if self.time_kinds[row] == _RAW else _decode_time(self.time_kinds[row], self.published[row]),
+            "likes": self.overrides.get((row, "likes"), self.likes[row])
+        }
+
+    @classmethod
+    def from_tree(cls, comments):
+        """Build from the JSON layout: top-level comment dicts, each with a "subcomments" list."""
+        table = cls()
+        for comment in comments:
+            row = table.add(comment["author"], comment["comment"], comment["published_at"], comment["likes"])
+            for subcomment in comment.get("subcomments", []):
+                table.add(subcomment["author"], subcomment["comment"], subcomment["published_at"],
+                          subcomment["likes"], parent=row)
+        return table
+
+    def to_tree(self):
+        """The JSON layout this table was built from."""
+        comments = []
+        by_row = {}
+        for row, parent in enumerate(self.parents):
+            record = self.row(row)
+            if parent < 0:
+                record["subcomments"] = []
+                by_row[row] = record
+                comments.append(record)
+            else:
+                by_row[parent]["subcomments"].append(record)
+        return comments
+
+    def top_level_count(self):
+        return sum(1 for parent in self.parents if parent < 0)
+
+    def total_likes(self):
+        return sum(self.likes)
+
+class Record:
+    """Base for fixed-field records that read like the dicts they replace.
+
+    `record["title"]` and `record.get("title")` work as on the JSON dict, and
+    to_dict() / from_dict() convert to and from that layout without loss.
+    Subclasses list their JSON keys, in order, in FIELDS.
+    """
+    __slots__ = ("extra",)
+    FIELDS = ()
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            value = self._value(key)
+            return value.to_tree() if isinstance(value, CommentTable) else value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.FIELDS or bool(self.extra and key in self.extra)
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, Record) else other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def keys(self):
+        return list(self.FIELDS) + list(self.extra or ())
+
+    def _value(self, key):
+        return getattr(self, key)
+
+    def to_dict(self):
+        data = {key: self[key] for key in self.FIELDS}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls(**{key: data[key] for key in cls.FIELDS})
+        extra = {key: value for key, value in data.items() if key not in cls.FIELDS}
+        record.extra = extra or None
+        return record
+
+class RedditPost(Record):
+    __slots__ = ("title", "url", "score", "comments_count", "author", "created_utc", "selftext", "comments")
+    FIELDS = __slots__
+
+    def __init__(self, title, url, score, comments_count, author, created_utc, selftext, comments=None):
+        self.title = title
+        self.url = url
+        self.score = score
+        self.comments_count = comments_count
+        self.author = author
+        self.created_utc = created_utc
+        self.selftext = selftext
+        self.comments = comments if isinstance(comments, CommentTable) else CommentTable.from_tree(comments or [])
+        self.extra = None
+
+class YouTubeVideo(Record):
+    """A video record. The API returns counts as strings; they are stored as ints and written back as strings."""
+    __slots__ = ("title", "url", "views", "likes", "published_at", "channel_title", "channel_creation_date",
+                 "subscribers", "transcript", "comments", "_string_counts")
+    FIELDS = __slots__[:-1]
+    COUNT_FIELDS = ("views", "likes", "subscribers")
+
+    def __init__(self, title, url, views, likes, published_at, channel_title, channel_creation_date, subscribers,
+                 transcript, comments=None):
+        self.title = title
+        self.url = url
+        self._string_counts = 0  # Bit per COUNT_FIELDS entry that arrived as a digit string
+        for bit, (field, value) in enumerate(zip(self.COUNT_FIELDS, (views, likes, subscribers))):
+            if isinstance(value, str) and value.isascii() and value.isdigit() and str(int(value)) == value:
+                value = int(value)
+                self._string_counts |= 1 << bit
+            setattr(self, field, value)
+        self.published_at = published_at
+        self.channel_title = channel_title
+        self.channel_creation_date = channel_creation_date
+        self.transcript = transcript
+        self.comments = comments if isinstance(comments, CommentTable) else CommentTable.from_tree(comments or [])
+        self.extra = None
+
+    def _value(self, key):
+        value = getattr(self, key)
+        if key in self.COUNT_FIELDS and self._string_counts & (1 << self.COUNT_FIELDS.index(key)):
+            return str(value)
+        return value
+
+def record_from_dict(data):
+    """RedditPost or YouTubeVideo for a post or video dict in the JSON layout."""
+    return YouTubeVideo.from_dict(data) if "transcript" in data else RedditPost.from_dict(data)
+
+def json_default(value):
+    """`default` for json.dump, so topic data holding records is written in the usual layout."""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, CommentTable):
+        return value.to_tree()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -1,91 +1,328 @@
 # reddit.py
 import praw
+from praw.models import MoreComments
+import heapq
 import logging
-from collections import Counter
-import re
-import nltk
-from nltk.corpus import stopwords
 import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, local
+from records import CommentTable, RedditPost
+from run_cache import RunCache
+from topics import extract_topics
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-nltk.download('stopwords')
+# Reddit's rate-limit window in seconds; windows start on multiples of it
+RATE_LIMIT_WINDOW = 600
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every thread making Reddit requests.
+
+    Starts at `rate` requests per second and is re-tuned from Reddit's
+    X-Ratelimit-Remaining / X-Ratelimit-Reset headers as responses arrive, so
+    the remaining budget is spread evenly over the rest of the window. Newer
+    prawcore versions only report the remaining and used counts; the reset
+    time is then taken as the end of the current RATE_LIMIT_WINDOW.
+    """
+    def __init__(self, rate=1.0, capacity=5):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = Lock()
+        self.limits_missing_logged = False
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def update_from_limits(self, remaining, reset_timestamp=None):
+        if remaining is None:
+            if not self.limits_missing_logged:
+                self.limits_missing_logged = True
+                logger.warning(f"Reddit rate-limit headers unavailable; staying at {self.rate:.2f} requests/s")
+            return
+        if reset_timestamp is None:
+            now = time.time()
+            reset_timestamp = now - now % RATE_LIMIT_WINDOW + RATE_LIMIT_WINDOW
+        with self.lock:
+            seconds_left = max(1.0, reset_timestamp - time.time())
+            self.rate = max(remaining, 1) / seconds_left
+            self.tokens = min(self.tokens, max(remaining, 0))
 
 class RedditScraper:
-    def __init__(self):
-        self.reddit = praw.Reddit(
+    def __init__(self, max_workers=1, more_comments_budget=5, run_cache=None, watermarks=None):
+        self.credentials = dict(
             client_id="ENTER_YOUR_ID",
             client_secret="ENTER_YOUR_SECRET",
             user_agent="project by u/YOUR_REDDIT_USERNAME",
             username="YOUR_REDDIT_USERNAME",
             password="YOUR_REDDIT_ACCOUNT_PASSWORD"
         )
+        self.reddit = praw.Reddit(**self.credentials)
+        self.max_workers = max_workers  # >1 fetches subreddits and posts concurrently
+        self.more_comments_budget = more_comments_budget  # "load more" requests allowed per post
+        self.rate_limiter = TokenBucket()
+        self._local = local()
+        # One long-lived pool, so each of its threads builds (and authenticates) one PRAW client per scraper
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reddit") if max_workers > 1 else None
+        # Posts, listings and searches already fetched this run; share one with YouTubeScraper per run
+        self.run_cache = run_cache or RunCache()
+        # With a WatermarkStore, only new posts and posts with new comments are fetched (incremental mode)
+        self.watermarks = watermarks
+        self._fetched = {}  # url -> (post id, comment count) of posts fetched this run, recorded once stored
+        self._fetched_ids = set()  # Later phases of the run still want these, even if unchanged
+
+    def client(self):
+        """PRAW instances are not thread-safe, so each worker thread gets its own."""
+        reddit = getattr(self._local, "reddit", None)
+        if reddit is None:
+            if self.max_workers <= 1:
+                reddit = self.reddit
+            else:
+                self.rate_limit()  # A new client's first request also fetches an OAuth token
+                reddit = praw.Reddit(**self.credentials)
+            self._local.reddit = reddit
+        return reddit
+
+    def close(self):
+        """Shut down the shared pool, dropping work that has not started."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
 
     def rate_limit(self):
-        time.sleep(1)
+        """Wait for a token before a network call; only call this right before a request is made."""
+        self.rate_limiter.acquire()
+
+    def update_rate_limit(self, reddit):
+        limits = reddit.auth.limits
+        self.rate_limiter.update_from_limits(limits.get("remaining"), limits.get("reset_timestamp"))
 
     def search_political_subreddits(self, query, limit=10):
-        try:
-            subreddit_results = list(self.reddit.subreddits.search(query, limit=limit))
+        return self.run_cache.get_or_fetch(
+            "subreddit_search", (query, limit), lambda: self._search_subreddits(query, limit)
+        )
+
+    def _search_subreddits(self, query, limit):
+        def search():
+            self.rate_limit()
+            reddit = self.client()
+            subreddit_results = list(reddit.subreddits.search(query, limit=limit))
+            self.update_rate_limit(reddit)
             return [sub.display_name for sub in subreddit_results]
+
+        try:
+            # Searches for different topics may run at once; the pool's threads each have their own client
+            return search() if self.executor is None else self.executor.submit(search).result()
         except Exception as e:
             logger.error(f"Error searching subreddits for '{query}': {str(e)}")
             return []
 
-    def get_post_data(self, post, num_comments=10, num_subcomments=5):
+    def has_new_activity(self, post):
+        """False for posts a previous incremental run already stored with the same comment count."""
+        return (self.watermarks is None or post.id in self._fetched_ids
+                or self.watermarks.activity_changed("reddit", post.id, post.num_comments))
+
+    def mark_stored(self, topic, posts):
+        """Record the activity of posts stored under topic.
+
+        Only stored posts are recorded, so posts that were fetched but never
+        stored (hot-listing posts used for counting topics, or a run that
+        crashed first) are fetched again by the next incremental run.
+        """
+        if self.watermarks is None:
+            return
+        for post in posts:
+            fetched = self._fetched.get(post["url"])
+            if fetched is not None:
+                self.watermarks.record_activity("reddit", *fetched)
+
+    def get_post_data(self, post, num_comments=10, num_subcomments=5, acquire_token=True):
+        """Post record with its top comments, built at most once per run for each post."""
+        return self.run_cache.get_or_fetch(
+            "reddit_post", (post.id, num_comments, num_subcomments),
+            lambda: self._build_post_data(post, num_comments, num_subcomments, acquire_token)
+        )
+
+    def _build_post_data(self, post, num_comments, num_subcomments, acquire_token):
         try:
             # Only proceed if selftext is non-empty
             if not post.selftext or post.selftext.strip() == "":
                 logger.info(f"Skipping post {post.id}: No selftext available.")
                 return None
 
-            post_data = {
-                "title": post.title,
-                "url": post.url,
-                "score": post.score,
-                "comments_count": post.num_comments,
-                "author": post.author.name if post.author else "Unknown",
-                "created_utc": post.created_utc,
-                "selftext": post.selftext,
-                "comments": []
-            }
-            post.comments.replace_more(limit=0)
-            top_comments = sorted(post.comments, key=lambda c: c.score, reverse=True)[:num_comments]
+            if acquire_token:
+                post.comment_sort = "top"  # Loaded comments are then the highest scored ones we select from
+                self.rate_limit()  # The comment tree below is the first request for this post
+
+            comments = CommentTable()
+            post_data = RedditPost(
+                title=post.title,
+                url=post.url,
+                score=post.score,
+                comments_count=post.num_comments,
+                author=post.author.name if post.author else "Unknown",
+                created_utc=post.created_utc,
+                selftext=post.selftext,
+                comments=comments
+            )
+            budget = [self.more_comments_budget]  # Shared by every level of this post's tree
+            loaded = {}  # Parent fullname -> its replies that came back in "load more" responses
+            top_level = self.expand_comments(post.comments, post.fullname, num_comments, budget, loaded)
+            self.update_rate_limit(self.client())
+            top_comments = heapq.nlargest(num_comments, top_level, key=lambda c: c.score)
             for comment in top_comments:
-                comment.replies.replace_more(limit=None)
-                comment_data = {
-                    "author": comment.author.name if comment.author else "Unknown",
-                    "comment": comment.body,
-                    "published_at": comment.created_utc,
-                    "likes": comment.score,
-                    "subcomments": []
-                }
-                subcomments = sorted(comment.replies, key=lambda r: r.score, reverse=True)[:num_subcomments]
+                row = comments.add(
+                    author=comment.author.name if comment.author else "Unknown",
+                    comment=comment.body,
+                    published_at=comment.created_utc,
+                    likes=comment.score
+                )
+                replies = self.expand_comments(comment.replies, comment.fullname, num_subcomments, budget, loaded)
+                subcomments = heapq.nlargest(num_subcomments, replies, key=lambda r: r.score)
                 for subcomment in subcomments:
-                    subcomment_data = {
-                        "author": subcomment.author.name if subcomment.author else "Unknown",
-                        "comment": subcomment.body,
-                        "published_at": subcomment.created_utc,
-                        "likes": subcomment.score
-                    }
-                    comment_data["subcomments"].append(subcomment_data)
-                post_data["comments"].append(comment_data)
+                    comments.add(
+                        author=subcomment.author.name if subcomment.author else "Unknown",
+                        comment=subcomment.body,
+                        published_at=subcomment.created_utc,
+                        likes=subcomment.score,
+                        parent=row
+                    )
+            if self.watermarks is not None:
+                self._fetched[post.url] = (post.id, post.num_comments)
+                self._fetched_ids.add(post.id)
             return post_data
         except Exception as e:
             logger.error(f"Error fetching data for post '{post.id}': {str(e)}")
             return None
 
+    def expand_comments(self, items, parent_fullname, needed, budget, loaded=None):
+        """Return the loaded direct children of one tree level, loading more only if needed.
+
+        "Load more" stubs at this level are expanded one request at a time, and
+        only while fewer than `needed` children are loaded and `budget[0]`
+        requests remain. Deeper stubs are never touched, unlike
+        replace_more(limit=None), which expands the whole subtree.
+
+        A "load more" response is flat: replies to the comments it loads come
+        back alongside them, with empty `.replies`. Those are kept in `loaded`
+        (parent fullname -> items) and used when that parent's level is expanded.
+        """
+        if loaded is None:
+            loaded = {}
+        items = list(items) + loaded.pop(parent_fullname, [])
+        children = [item for item in items if not isinstance(item, MoreComments)]
+        stubs = [item for item in items if isinstance(item, MoreComments)]
+        while len(children) < needed and stubs and budget[0] > 0:
+            more = stubs.pop(0)
+            budget[0] -= 1
+            self.rate_limit()
+            for item in more.comments(update=False):
+                if isinstance(item, MoreComments):
+                    item.submission = more.submission  # As replace_more does; comments() needs it to expand the stub
+                if item.parent_id != parent_fullname:
+                    loaded.setdefault(item.parent_id, []).append(item)  # A deeper reply; see above
+                elif isinstance(item, MoreComments):
+                    stubs.append(item)
+                else:
+                    children.append(item)
+        return children
+
+    def get_post_data_by_id(self, post_id, num_comments=10, num_subcomments=5):
+        """get_post_data on this thread's own client; the comment fetch also loads the post itself."""
+        return self.run_cache.get_or_fetch(
+            "reddit_post", (post_id, num_comments, num_subcomments),
+            lambda: self._load_post_data(post_id, num_comments, num_subcomments)
+        )
+
+    def _load_post_data(self, post_id, num_comments, num_subcomments):
+        try:
+            self.rate_limit()
+            post = self.client().submission(id=post_id)
+            post.comment_sort = "top"
+            post.comments  # One request loads both the post and its comment tree
+        except Exception as e:
+            logger.error(f"Error fetching data for post '{post_id}': {str(e)}")
+            return None
+        return self._build_post_data(post, num_comments, num_subcomments, acquire_token=False)
+
+    def _fetch_listing(self, sub, listing, cache_key=None):
+        """Posts of one subreddit listing; with cache_key, each listing is requested once per run."""
+        def fetch():
+            self.rate_limit()
+            reddit = self.client()
+            posts_batch = list(listing(reddit.subreddit(sub)))
+            self.update_rate_limit(reddit)
+            return posts_batch
+
+        if cache_key is None:
+            return fetch()
+        return self.run_cache.get_or_fetch("reddit_listing", (sub,) + cache_key, fetch)
+
+    def _fetch_posts_concurrently(self, subreddits, listing, error_message, limit=None, num_comments=10, num_subcomments=5,
+                                  cache_key=None):
+        """Fetch subreddit listings in parallel, then post data in parallel, keeping sequential order.
+
+        Posts are deduplicated by URL in subreddit order before any comment
+        tree is requested. With `limit`, only as many posts as are still needed
+        are fetched per round.
+        """
+        def fetch_listing(sub):
+            try:
+                return self._fetch_listing(sub, listing, cache_key)
+            except Exception as e:
+                logger.error(error_message.format(sub=sub, error=str(e)))
+                return []
+
+        candidates = []
+        seen_urls = set()  # For deduplication
+        for posts_batch in self.executor.map(fetch_listing, subreddits):
+            for post in posts_batch:
+                if post.url not in seen_urls and post.selftext and post.selftext.strip() != "":
+                    seen_urls.add(post.url)
+                    if self.has_new_activity(post):
+                        candidates.append(post.id)
+
+        posts = []
+        while candidates and (limit is None or len(posts) < limit):
+            needed = len(candidates) if limit is None else limit - len(posts)
+            window, candidates = candidates[:needed], candidates[needed:]
+            for post_data in self.executor.map(
+                lambda post_id: self.get_post_data_by_id(post_id, num_comments, num_subcomments), window
+            ):
+                if post_data:  # Only append if post_data is not None
+                    posts.append(post_data)
+        return posts
+
     def fetch_reddit_posts(self, subreddits, limit_per_sub=15, num_comments=10, num_subcomments=5):
+        if self.max_workers > 1:
+            return self._fetch_posts_concurrently(
+                subreddits,
+                lambda subreddit: subreddit.hot(limit=limit_per_sub),
+                "Could not fetch posts from subreddit {sub}: {error}",
+                num_comments=num_comments,
+                num_subcomments=num_subcomments,
+                cache_key=("hot", limit_per_sub)
+            )
         posts = []
         seen_urls = set()  # For deduplication
         for sub in subreddits:
             try:
-                self.rate_limit()
-                posts_batch = list(self.reddit.subreddit(sub).hot(limit=limit_per_sub))
+                posts_batch = self._fetch_listing(sub, lambda subreddit: subreddit.hot(limit=limit_per_sub), ("hot", limit_per_sub))
                 for post in posts_batch:
-                    self.rate_limit()
                     if post.url not in seen_urls and post.selftext and post.selftext.strip() != "":
+                        if not self.has_new_activity(post):
+                            seen_urls.add(post.url)  # Unchanged since the last run; don't take a duplicate instead
+                            continue
                         post_data = self.get_post_data(post, num_comments, num_subcomments)
                         if post_data:  # Only append if post_data is not None
                             posts.append(post_data)
@@ -95,35 +332,38 @@ class RedditScraper:
         return posts
 
     def extract_topics(self, posts, top_n=15):
-        try:
-            stop_words = set(stopwords.words('english'))
-            words = []
-            for post in posts:
-                text = post.get('title', '') + " " + post.get('selftext', '')
-                tokens = re.findall(r'\b(?!https?://)\w{4,}\b', text.lower())
-                tokens = [token for token in tokens if token not in stop_words and not token.startswith('http')]
-                words.extend(tokens)
-            freq = Counter(words)
-            return [word for word, count in freq.most_common(top_n)]
-        except Exception as e:
-            logger.error(f"Error extracting topics: {str(e)}")
-            return []
+        """Most frequent terms across the posts' titles and selftext."""
+        return extract_topics(posts, top_n=top_n)
 
     def gather_posts_for_topic(self, topic, subreddits, limit=15, num_comments=10, num_subcomments=5):
+        def search(subreddit):
+            return subreddit.search(
+                query=topic,
+                sort='hot',
+                limit=limit,
+                time_filter='month'
+            )
+
+        if self.max_workers > 1:
+            return self._fetch_posts_concurrently(
+                subreddits,
+                search,
+                f"Error fetching posts for topic '{topic}' in '{{sub}}': {{error}}",
+                limit=limit,
+                num_comments=num_comments,
+                num_subcomments=num_subcomments,
+                cache_key=("search", topic, limit)
+            )
         posts = []
         seen_urls = set()  # For deduplication
         for sub in subreddits:
             try:
-                self.rate_limit()
-                posts_batch = list(self.reddit.subreddit(sub).search(
-                    query=topic,
-                    sort='hot',
-                    limit=limit,
-                    time_filter='month'
-                ))
+                posts_batch = self._fetch_listing(sub, search, ("search", topic, limit))
                 for post in posts_batch:
-                    self.rate_limit()
                     if post.url not in seen_urls and post.selftext and post.selftext.strip() != "":
+                        if not self.has_new_activity(post):
+                            seen_urls.add(post.url)  # Unchanged since the last run; don't take a duplicate instead
+                            continue
                         post_data = self.get_post_data(post, num_comments, num_subcomments)
                         if post_data:  # Only append if post_data is not None
                             posts.append(post_data)
@@ -132,4 +372,6 @@ class RedditScraper:
                         break
             except Exception as e:
                 logger.error(f"Error fetching posts for topic '{topic}' in '{sub}': {str(e)}")
+            if len(posts) >= limit:
+                break  # Don't spend requests on listings that can't contribute
         return posts[:limit]
@@ -0,0 +1,77 @@
+import logging
+from collections import Counter
+from concurrent.futures import Future
+from threading import Lock
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class RunCache:
+    """In-memory cache of entities fetched during one collection run.
+
+    Entries are keyed by (kind, key), e.g. ("reddit_post", post_id) or
+    ("youtube_search", query). Create one per run and share it between the
+    scrapers so each post, video, channel and search is fetched at most once.
+    get_or_fetch is single-flight: a thread asking for an entry that another
+    thread is already fetching waits for that result instead of fetching again.
+    None results (skipped or failed fetches) are not kept, so a later phase
+    can retry them.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.entries = {}
+        self.pending = {}  # (kind, key) -> Future of the fetch in progress
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def get_or_fetch(self, kind, key, fetch):
+        cache_key = (kind, key)
+        with self.lock:
+            if cache_key in self.entries:
+                self.hits[kind] += 1
+                return self.entries[cache_key]
+            future = self.pending.get(cache_key)
+            if future is None:
+                future = self.pending[cache_key] = Future()
+                self.misses[kind] += 1
+                owner = True
+            else:
+                self.hits[kind] += 1
+                owner = False
+        if not owner:
+            return future.result()
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self.lock:
+                del self.pending[cache_key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            del self.pending[cache_key]
+            if value is not None:
+                self.entries[cache_key] = value
+        future.set_result(value)
+        return value
+
+    def get_many(self, kind, keys):
+        """Return {key: value} for the keys already cached; for batched lookups that fetch the rest together."""
+        with self.lock:
+            found = {key: self.entries[(kind, key)] for key in keys if (kind, key) in self.entries}
+            self.hits[kind] += len(found)
+            self.misses[kind] += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, kind, values):
+        with self.lock:
+            for key, value in values.items():
+                self.entries[(kind, key)] = value
+
+    def stats(self):
+        """{kind: (hits, misses)} for every kind looked up so far."""
+        with self.lock:
+            return {kind: (self.hits[kind], self.misses[kind]) for kind in set(self.hits) | set(self.misses)}
+
+    def log_stats(self):
+        for kind, (hits, misses) in sorted(self.stats().items()):
+            logger.info(f"Run cache {kind}: {hits} reused, {misses} fetched")
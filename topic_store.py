@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import time
+from threading import Lock
+
+from records import json_default
+
+DEFAULT_TOPIC_STORE_PATH = "trending_topics.jsonl"
+
+ITEM_KINDS = {"reddit_posts": "reddit_post", "youtube_videos": "youtube_video"}
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default)
+
+def item_key(item, kind):
+    """A post's or video's URL, or a hash of its text when it has none."""
+    if item.get("url"):
+        return item["url"]
+    text = item.get("selftext" if kind == "reddit_post" else "transcript") or ""
+    return f"{kind}:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class TopicStore:
+    """Append-only store of scraped topics, posts and videos with an offset index.
+
+    Every post, video and finished topic is appended to `path` as one compact
+    JSON line the moment it is gathered, so a crash loses at most the topic in
+    progress. A topic line points at the exact lines of its posts and videos,
+    and an item seen unchanged under several topics is stored once. `path + ".idx"` maps
+    (kind, key) to the byte range of the latest line for it, so get() reads
+    one record with a single seek instead of parsing the file. If the index
+    trails the data (e.g. after a crash), the missing entries are rebuilt on
+    open and a half-written last line is dropped.
+
+    Topics are grouped by run (one per collection, `run_id`); export_legacy
+    writes a run in the old trending_topics_info.json layout.
+    """
+    def __init__(self, path=DEFAULT_TOPIC_STORE_PATH, run_id=None):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.run_id = run_id or time.strftime("%Y%m%dT%H%M%S")
+        self.lock = Lock()
+        self.index = {}  # (kind, key) -> (offset, length)
+        self.topic_keys = []  # (run_id, topic) in the order they were stored
+        self._written = {}  # (kind, key) -> (digest, offset, length) of the latest line this instance wrote
+        self._load_index()
+        self.data_file = open(path, 'ab')
+        self.index_file = open(self.index_path, 'a', encoding='utf-8')
+        self._recover()
+        self.reader = open(path, 'rb')
+
+    def _add_to_index(self, kind, key, offset, length):
+        self.index[(kind, key)] = (offset, length)
+        if kind == "topic":
+            self.topic_keys.append(tuple(key))
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        good_end = 0
+        with open(self.index_path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    kind, key, offset, length = json.loads(line)
+                except ValueError:
+                    break  # Half-written last line; _recover re-indexes from the data file
+                self._add_to_index(kind, tuple(key) if isinstance(key, list) else key, offset, length)
+                good_end += len(line)
+        if good_end < os.path.getsize(self.index_path):
+            # Drop the fragment, so entries appended from now on start on a line of their own
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(good_end)
+
+    def _recover(self):
+        """Index lines present in the data file but missing from the index, and drop a partial last line."""
+        indexed_end = max((offset + length for offset, length in self.index.values()), default=0)
+        size = os.path.getsize(self.path)
+        if size <= indexed_end:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(indexed_end)
+            offset = indexed_end
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                self._write_index(record["kind"], record["key"], offset, len(line))
+                offset += len(line)
+        if offset < size:
+            self.data_file.truncate(offset)
+        self._sync()
+
+    def _write_index(self, kind, key, offset, length):
+        key = tuple(key) if isinstance(key, list) else key
+        self._add_to_index(kind, key, offset, length)
+        self.index_file.write(_encode([kind, key, offset, length]) + "\n")
+
+    def _append(self, kind, key, encoded_value):
+        # {"kind":...,"key":...,"value":...} around a value that is already encoded
+        line = (_encode({"kind": kind, "key": key})[:-1] + ',"value":' + encoded_value + "}\n").encode("utf-8")
+        offset = self.data_file.seek(0, os.SEEK_END)
+        self.data_file.write(line)
+        self.data_file.flush()  # Data before index, so the index never points past the data
+        self._write_index(kind, key, offset, len(line))
+        return offset, len(line)
+
+    def _append_item(self, kind, key, item):
+        """Store an item unless this instance already wrote it unchanged; returns its [key, offset, length]."""
+        encoded = _encode(item)
+        digest = hashlib.sha1(encoded.encode("utf-8")).digest()
+        written = self._written.get((kind, key))
+        if written is None or written[0] != digest:
+            # Re-scraped items (e.g. new view counts) get a new line; earlier topics keep pointing at theirs
+            written = (digest,) + self._append(kind, key, encoded)
+            self._written[(kind, key)] = written
+        return [key, written[1], written[2]]
+
+    def _sync(self):
+        self.data_file.flush()
+        os.fsync(self.data_file.fileno())
+        self.index_file.flush()
+        os.fsync(self.index_file.fileno())
+
+    def append_topic(self, topic_data):
+        """Store one {"topic", "reddit_posts", "youtube_videos"} entry under the current run."""
+        with self.lock:
+            entry = {"topic": topic_data["topic"]}
+            for field, kind in ITEM_KINDS.items():
+                entry[field] = [
+                    self._append_item(kind, item_key(item, kind), item) for item in topic_data.get(field, [])
+                ]
+            self._append("topic", [self.run_id, topic_data["topic"]], _encode(entry))
+            self._sync()
+
+    def _read(self, offset, length):
+        with self.lock:
+            self.reader.seek(offset)
+            return json.loads(self.reader.read(length))["value"]
+
+    def get(self, kind, key):
+        """The latest stored value for kind ("topic", "reddit_post" or "youtube_video") and key, or None."""
+        location = self.index.get((kind, tuple(key) if isinstance(key, list) else key))
+        return None if location is None else self._read(*location)
+
+    def get_topic(self, topic, run_id=None):
+        """A topic in the legacy layout, with its posts and videos filled in."""
+        entry = self.get("topic", (run_id or self.run_id, topic))
+        if entry is None:
+            return None
+        topic_data = {"topic": entry["topic"]}
+        for field, kind in ITEM_KINDS.items():
+            topic_data[field] = [self._read(offset, length) for key, offset, length in entry[field]]
+        return topic_data
+
+    def runs(self):
+        return list(dict.fromkeys(run_id for run_id, _ in self.topic_keys))
+
+    def iter_topics(self, run_id=None):
+        """Yield a run's topics (default: this store's run) in the order they were stored."""
+        run_id = run_id or self.run_id
+        for key_run, topic in list(dict.fromkeys(self.topic_keys)):
+            if key_run == run_id:
+                yield self.get_topic(topic, run_id)
+
+    def export_legacy(self, out_path, run_id=None, indent=4):
+        """Write a run in the trending_topics_info.json layout, one topic in memory at a time.
+
+        The output matches json.dump(topics, f, indent=indent) of the same list.
+        """
+        with open(out_path, 'w', encoding='utf-8') as f:
+            empty = True
+            for topic_data in self.iter_topics(run_id):
+                text = json.dumps(topic_data, indent=indent)
+                f.write(("[\n" if empty else ",\n") + "\n".join(" " * indent + line for line in text.split("\n")))
+                empty = False
+            f.write("[]" if empty else "\n]")
+
+    def close(self):
+        with self.lock:
+            self._sync()
+            self.data_file.close()
+            self.index_file.close()
+            self.reader.close()
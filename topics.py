@@ -0,0 +1,295 @@
+import heapq
+import logging
+import math
+import re
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+
+import nltk
+from nltk.corpus import stopwords
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Download stopwords
+nltk.download('stopwords')
+
+# Words of at least 4 characters; URL fragments ("http", "https...") are dropped after matching
+TOKEN_PATTERN = re.compile(r"\b\w{4,}\b")
+
+# Term sizes counted by default: 1 = single words, 2 = adjacent word pairs
+DEFAULT_NGRAMS = (1,)
+
+@lru_cache(maxsize=None)
+def stop_words(language='english'):
+    """The NLTK stopword set, built once per process instead of once per call."""
+    return frozenset(stopwords.words(language))
+
+def item_text(item):
+    """Text used for topics: plain strings as-is; posts and videos (dicts or records) by title plus Reddit selftext."""
+    if isinstance(item, str):
+        return item
+    return item.get('title', '') + " " + item.get('selftext', '')
+
+def item_timestamp(item):
+    """Epoch seconds of a post (created_utc) or video/comment (ISO published_at), or None."""
+    value = item.get('created_utc', item.get('published_at'))
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+def text_terms(text, stop_words, ngrams=DEFAULT_NGRAMS):
+    """The terms of one text: stopword-free words and, if enabled, adjacent word pairs."""
+    tokens = [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in stop_words and not token.startswith('http')
+    ]
+    terms = []
+    for n in ngrams:
+        if n == 1:
+            terms.extend(tokens)
+        else:
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    return terms
+
+class SpaceSaving:
+    """Approximate top-k counter that never holds more than `capacity` items.
+
+    When full, a new item replaces the item with the smallest count and
+    inherits that count (Metwally et al.'s SpaceSaving), so any item seen
+    more than total/capacity times is guaranteed to be kept. A kept item's
+    count overestimates its true count by at most errors[item].
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.heap = []  # (count, item) entries; outdated ones are skipped when popped
+
+    def __getitem__(self, item):
+        return self.counts.get(item, 0)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def add(self, item, count=1):
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            floor, evicted = self._pop_min()
+            del self.counts[evicted]
+            del self.errors[evicted]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+        heapq.heappush(self.heap, (self.counts[item], item))
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(c, i) for i, c in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def _pop_min(self):
+        while True:
+            count, item = heapq.heappop(self.heap)
+            if self.counts.get(item) == count:
+                return count, item
+
+    def most_common(self, n=None):
+        if n is None:
+            return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        return heapq.nlargest(n, self.counts.items(), key=lambda kv: kv[1])
+
+class TopicEngine:
+    """Incremental trending-term counts for posts and videos as they stream in.
+
+    Each added text updates the counts of its terms, overall and for its
+    `source` (e.g. "reddit", "youtube"), along with how many texts contain each
+    term. Nothing else is kept, so the engine can run over a whole feed
+    without rescanning it. `top()` ranks terms by raw count or by TF-IDF, with
+    the document frequency pooled across sources so their weights compare.
+
+    With `capacity`, every table is a SpaceSaving counter of at most that many
+    terms, which bounds memory at the cost of approximate counts for terms
+    near the cut-off.
+    """
+    def __init__(self, ngrams=DEFAULT_NGRAMS, capacity=None, language='english'):
+        self.ngrams = tuple(ngrams)
+        self.capacity = capacity
+        self.stop_words = stop_words(language)
+        self.counts = {None: self._new_counter()}  # None holds the totals over every source
+        self.document_counts = self._new_counter()
+        self.documents = 0
+
+    def _new_counter(self):
+        return Counter() if self.capacity is None else SpaceSaving(self.capacity)
+
+    def terms(self, text):
+        return text_terms(text, self.stop_words, self.ngrams)
+
+    def add(self, item, source=None):
+        """Count the terms of one text, post dict or video dict."""
+        terms = self.terms(item_text(item))
+        self.counts[None].update(terms)
+        if source is not None:
+            if source not in self.counts:
+                self.counts[source] = self._new_counter()
+            self.counts[source].update(terms)
+        self.document_counts.update(set(terms))
+        self.documents += 1
+
+    def add_many(self, items, source=None):
+        for item in items:
+            self.add(item, source)
+
+    def idf(self, term):
+        return math.log((1 + self.documents) / (1 + self.document_counts[term])) + 1
+
+    def top(self, n=10, source=None, weighting="count"):
+        """The n highest ranked terms overall or for one source; weighting is "count" or "tfidf"."""
+        counts = self.counts.get(source)
+        if counts is None:
+            return []
+        if weighting == "count":
+            return [term for term, count in counts.most_common(n)]
+        if weighting != "tfidf":
+            raise ValueError(f"Unknown weighting '{weighting}'")
+        return [
+            term for term, count in heapq.nlargest(
+                n, counts.most_common(), key=lambda kv: kv[1] * self.idf(kv[0])
+            )
+        ]
+
+class _TermSeries:
+    """Per-bucket term counts for one source, plus running totals of the window and baseline spans."""
+    def __init__(self):
+        self.buckets = {}  # bucket index -> Counter of terms
+        self.window = Counter()
+        self.baseline = Counter()
+
+def _add_counts(totals, counts, sign):
+    for term, count in counts.items():
+        total = totals[term] + sign * count
+        if total > 0:
+            totals[term] = total
+        else:
+            totals.pop(term, None)
+
+class BurstDetector:
+    """Terms rising in the latest time window compared with the span before it.
+
+    Items are counted into time buckets by created_utc / published_at, per
+    source and combined. The running totals of the last `window_hours` and of
+    the `baseline_hours` before them are kept up to date as items arrive and
+    as time moves forward, so a query only ranks the terms already in the
+    window instead of recounting the corpus. Buckets older than the baseline
+    are dropped, which bounds memory to the tracked span.
+
+    A term's burst score is the Poisson z-score of its window count against
+    the count its baseline rate predicts for a window of the same length.
+    """
+    def __init__(self, window_hours=24, baseline_hours=7 * 24, bucket_minutes=60, ngrams=DEFAULT_NGRAMS,
+                 language='english'):
+        self.bucket_seconds = bucket_minutes * 60
+        self.window_buckets = max(1, int(window_hours * 60 // bucket_minutes))
+        self.baseline_buckets = max(1, int(baseline_hours * 60 // bucket_minutes))
+        self.ngrams = tuple(ngrams)
+        self.stop_words = stop_words(language)
+        self.current = None  # Index of the newest bucket
+        self.series = {None: _TermSeries()}  # None holds the totals over every source
+
+    def advance(self, timestamp):
+        """Move the window forward to `timestamp` (e.g. time.time() between polls)."""
+        index = int(timestamp // self.bucket_seconds)
+        if self.current is None:
+            self.current = index
+            return
+        if index <= self.current:
+            return
+        if index - self.current > self.window_buckets + self.baseline_buckets:
+            # Everything tracked has aged out
+            for series in self.series.values():
+                series.buckets.clear()
+                series.window.clear()
+                series.baseline.clear()
+            self.current = index
+            return
+        for current in range(self.current + 1, index + 1):
+            leaving_window = current - self.window_buckets
+            leaving_baseline = leaving_window - self.baseline_buckets
+            for series in self.series.values():
+                counts = series.buckets.get(leaving_window)
+                if counts:
+                    _add_counts(series.window, counts, -1)
+                    _add_counts(series.baseline, counts, 1)
+                counts = series.buckets.pop(leaving_baseline, None)
+                if counts:
+                    _add_counts(series.baseline, counts, -1)
+        self.current = index
+
+    def add(self, item, source=None, timestamp=None):
+        """Count a post or video's terms once, in the bucket of its timestamp. Returns False if it is too old."""
+        timestamp = item_timestamp(item) if timestamp is None else timestamp
+        if timestamp is None:
+            return False
+        self.advance(timestamp)
+        index = int(timestamp // self.bucket_seconds)
+        if index <= self.current - self.window_buckets - self.baseline_buckets:
+            return False
+        in_window = index > self.current - self.window_buckets
+        # Each item counts a term once, so one long post cannot make a burst on its own
+        counts = Counter(set(text_terms(item_text(item), self.stop_words, self.ngrams)))
+        keys = [None] if source is None else [None, source]
+        for key in keys:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _TermSeries()
+            series.buckets.setdefault(index, Counter()).update(counts)
+            _add_counts(series.window if in_window else series.baseline, counts, 1)
+        return True
+
+    def add_many(self, items, source=None):
+        for item in items:
+            self.add(item, source)
+
+    def scores(self, source=None, min_count=2):
+        """{term: burst score} for terms seen at least min_count times in the window."""
+        series = self.series.get(source)
+        if series is None:
+            return {}
+        ratio = self.window_buckets / self.baseline_buckets
+        return {
+            term: (count - series.baseline[term] * ratio) / math.sqrt(series.baseline[term] * ratio + 1)
+            for term, count in series.window.items() if count >= min_count
+        }
+
+    def top_rising(self, n=10, source=None, min_count=2):
+        """The n terms with the highest burst scores, for one source or combined (source=None)."""
+        scores = self.scores(source, min_count)
+        return [term for term, score in heapq.nlargest(n, scores.items(), key=lambda kv: kv[1]) if score > 0]
+
+    def top_common(self, n=10, sources=("reddit", "youtube"), min_count=1):
+        """Terms rising in every one of sources, ranked by their lowest score among them."""
+        per_source = [self.scores(source, min_count) for source in sources]
+        shared = set.intersection(*(set(scores) for scores in per_source)) if per_source else set()
+        ranked = heapq.nlargest(n, ((term, min(scores[term] for scores in per_source)) for term in shared),
+                                key=lambda kv: kv[1])
+        return [term for term, score in ranked if score > 0]
+
+def extract_topics(items, top_n=10, **kwargs):
+    """One-off ranking of the most frequent terms in a list of texts, posts or videos."""
+    try:
+        engine = TopicEngine(**kwargs)
+        engine.add_many(items)
+        return engine.top(top_n)
+    except Exception as e:
+        logger.error(f"Error extracting topics: {str(e)}")
+        return []
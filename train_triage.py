@@ -0,0 +1,89 @@
+import argparse
+import json
+import time
+import zlib
+
+from analysis import DEFAULT_RESULTS_PATH, collect_items, iter_topics
+from triage import DEFAULT_TRIAGE_MODEL_PATH, CheckWorthinessModel
+
+REPORT_THRESHOLDS = [0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
+
+def load_verdicts(results_path):
+    """{item id: True if the LLM found any claim in it} from a claim_results.jsonl file.
+
+    Results the triage model kept away from the LLM are not verdicts, so they are left out.
+    """
+    verdicts = {}
+    with open(results_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                result = json.loads(line)
+                if result.get("triaged"):
+                    continue
+                verdicts[result["id"]] = verdicts.get(result["id"], False) or bool(result["claims"])
+    return verdicts
+
+def load_examples(file_path, verdicts):
+    """(id, text, label) for every non-empty post or transcript that the LLM has a verdict for."""
+    examples = {}
+    for topic_data in iter_topics(file_path):
+        for item in collect_items([topic_data]):
+            if item["id"] in verdicts and isinstance(item["text"], str) and item["text"].strip():
+                examples[item["id"]] = (item["id"], item["text"], verdicts[item["id"]])
+    return list(examples.values())
+
+def is_held_out(item_id, test_share=5):
+    # Stable split: the same item is always on the same side
+    return zlib.crc32(item_id.encode("utf-8")) % test_share == 0
+
+def recall_report(model, examples, thresholds=REPORT_THRESHOLDS):
+    """Rows of (threshold, share of texts sent to the LLM, share of its characters, recall of texts with claims)."""
+    scores = [(model.score(text), len(text), label) for _, text, label in examples]
+    positives = sum(1 for _, _, label in scores if label) or 1
+    total_chars = sum(length for _, length, _ in scores) or 1
+    rows = []
+    for threshold in thresholds:
+        sent = [(length, label) for score, length, label in scores if score >= threshold]
+        rows.append((
+            threshold,
+            len(sent) / len(scores),
+            sum(length for length, _ in sent) / total_chars,
+            sum(1 for _, label in sent if label) / positives
+        ))
+    return rows
+
+def choose_threshold(rows, target_recall):
+    """Highest threshold whose recall still meets the target."""
+    meeting = [threshold for threshold, _, _, recall in rows if recall >= target_recall]
+    return max(meeting) if meeting else min(threshold for threshold, _, _, _ in rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the check-worthiness triage model from past LLM verdicts")
+    parser.add_argument("file_path", nargs="?", default="trending_topics_info.json")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH, help="claim_results.jsonl written by a previous analysis")
+    parser.add_argument("--model", default=DEFAULT_TRIAGE_MODEL_PATH)
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--epochs", type=int, default=10)
+    args = parser.parse_args()
+
+    examples = load_examples(args.file_path, load_verdicts(args.results))
+    train = [example for example in examples if not is_held_out(example[0])]
+    test = [example for example in examples if is_held_out(example[0])] or train
+    print(f"{len(examples)} labelled texts ({sum(1 for _, _, label in examples if label)} with claims): "
+          f"{len(train)} for training, {len(test)} held out")
+
+    model = CheckWorthinessModel().fit([text for _, text, _ in train], [label for _, _, label in train], epochs=args.epochs)
+
+    start_time = time.time()
+    rows = recall_report(model, test)
+    elapsed = max(time.time() - start_time, 1e-9)
+    chars = sum(len(text) for _, text, _ in test)
+    print(f"Triage scoring: {len(test) / elapsed:.0f} texts/s, {chars / elapsed / 1e6:.1f} MB/s")
+
+    print(f"{'threshold':>9} {'texts sent':>10} {'chars sent':>10} {'recall':>7}")
+    for threshold, texts_sent, chars_sent, recall in rows:
+        print(f"{threshold:>9.2f} {texts_sent:>10.1%} {chars_sent:>10.1%} {recall:>7.1%}")
+
+    model.threshold = choose_threshold(rows, args.target_recall)
+    model.save(args.model)
+    print(f"Saved {args.model} with threshold {model.threshold:.2f} (target recall {args.target_recall:.0%})")
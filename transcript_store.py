@@ -0,0 +1,90 @@
+import hashlib
+import sqlite3
+import time
+from threading import Lock
+
+DEFAULT_TRANSCRIPT_STORE_PATH = "transcript_cache.sqlite3"
+
+class TranscriptStore:
+    """SQLite store of YouTube transcripts and translated text chunks.
+
+    Transcripts are keyed by video ID and keep both the original text and its
+    English translation. Videos without a transcript are remembered for
+    `unavailable_ttl_days` only, since captions are often added after upload.
+    Translations are cached per chunk, keyed by a hash of the chunk text and
+    the target language, so a chunk shared by two transcripts is translated once.
+    """
+    def __init__(self, path=DEFAULT_TRANSCRIPT_STORE_PATH, unavailable_ttl_days=1):
+        self.path = path
+        self.unavailable_ttl_days = unavailable_ttl_days
+        self.lock = Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                "video_id TEXT PRIMARY KEY, "
+                "available INTEGER NOT NULL, "
+                "original TEXT, "
+                "language TEXT, "
+                "translated TEXT, "
+                "fetched_at REAL NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "chunk_hash TEXT NOT NULL, "
+                "dest TEXT NOT NULL, "
+                "text TEXT NOT NULL, "
+                "PRIMARY KEY (chunk_hash, dest))"
+            )
+
+    def get(self, video_id):
+        """Return {"available", "original", "language", "translated"} or None if unknown or expired."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT available, original, language, translated, fetched_at FROM transcripts WHERE video_id = ?",
+                (video_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        available, original, language, translated, fetched_at = row
+        if not available and time.time() - fetched_at > self.unavailable_ttl_days * 86400:
+            return None
+        return {"available": bool(available), "original": original, "language": language, "translated": translated}
+
+    def put(self, video_id, original, language, translated=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO transcripts (video_id, available, original, language, translated, fetched_at) "
+                "VALUES (?, 1, ?, ?, ?, ?)",
+                (video_id, original, language, translated, time.time())
+            )
+
+    def put_unavailable(self, video_id):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO transcripts (video_id, available, original, language, translated, fetched_at) "
+                "VALUES (?, 0, NULL, NULL, NULL, ?)",
+                (video_id, time.time())
+            )
+
+    @staticmethod
+    def _chunk_hash(chunk):
+        return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+    def get_translation(self, chunk, dest):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT text FROM translations WHERE chunk_hash = ? AND dest = ?", (self._chunk_hash(chunk), dest)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_translation(self, chunk, dest, text):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO translations (chunk_hash, dest, text) VALUES (?, ?, ?)",
+                (self._chunk_hash(chunk), dest, text)
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,107 @@
+import json
+import math
+import os
+import random
+import re
+import zlib
+
+DEFAULT_TRIAGE_MODEL_PATH = "triage_model.json"
+
+# Texts scoring below this are assumed to hold no checkable claim and skip the LLM
+DEFAULT_TRIAGE_THRESHOLD = 0.3
+
+# Hashed feature space; collisions only cost a little accuracy
+NUM_BUCKETS = 1 << 18
+
+WORD_PATTERN = re.compile(r"\w+")
+DIGIT_PATTERN = re.compile(r"\d")
+
+def hashed_features(text, num_buckets=NUM_BUCKETS):
+    """L2-normalised {bucket: weight} of the text's word unigrams and bigrams, plus a length bucket.
+
+    Digits are folded to 0, so "2023" and "1947" share a feature.
+    """
+    words = WORD_PATTERN.findall(DIGIT_PATTERN.sub("0", text.lower()))
+    terms = words + [a + " " + b for a, b in zip(words, words[1:])]
+    terms.append(f"__length_{min(len(words).bit_length(), 16)}")
+    counts = {}
+    for term in terms:
+        bucket = zlib.crc32(term.encode("utf-8")) % num_buckets
+        counts[bucket] = counts.get(bucket, 0) + 1
+    norm = math.sqrt(sum(count * count for count in counts.values()))
+    return {bucket: count / norm for bucket, count in counts.items()}
+
+class CheckWorthinessModel:
+    """Logistic regression over hashed n-grams scoring whether a text holds checkable claims.
+
+    Cheap enough to run on every text on CPU. It is trained offline from past
+    LLM verdicts (a text is positive if the LLM found any claim in it), and
+    only texts scoring at least `threshold` are sent to the LLM.
+    """
+    def __init__(self, weights=None, bias=0.0, threshold=DEFAULT_TRIAGE_THRESHOLD, num_buckets=NUM_BUCKETS):
+        self.weights = weights or {}
+        self.bias = bias
+        self.threshold = threshold
+        self.num_buckets = num_buckets
+
+    def score(self, text):
+        """Probability that text is worth checking."""
+        if not isinstance(text, str) or not text.strip():
+            return 0.0
+        features = hashed_features(text, self.num_buckets)
+        z = self.bias + sum(self.weights.get(bucket, 0.0) * value for bucket, value in features.items())
+        return 1.0 / (1.0 + math.exp(-max(min(z, 35.0), -35.0)))
+
+    def is_check_worthy(self, text):
+        return self.score(text) >= self.threshold
+
+    def fit(self, texts, labels, epochs=10, learning_rate=0.5, l2=1e-5, seed=0):
+        """Train with SGD on log loss, weighting the classes so the rarer one is not ignored."""
+        examples = [(hashed_features(text, self.num_buckets), label) for text, label in zip(texts, labels)]
+        positives = sum(1 for _, label in examples if label)
+        negatives = len(examples) - positives
+        if not positives or not negatives:
+            raise ValueError("Training needs both texts with and without claims")
+        class_weight = {1: len(examples) / (2 * positives), 0: len(examples) / (2 * negatives)}
+        generator = random.Random(seed)
+        for epoch in range(epochs):
+            generator.shuffle(examples)
+            rate = learning_rate / (1 + epoch)
+            for features, label in examples:
+                z = self.bias + sum(self.weights.get(bucket, 0.0) * value for bucket, value in features.items())
+                prediction = 1.0 / (1.0 + math.exp(-max(min(z, 35.0), -35.0)))
+                gradient = (prediction - (1 if label else 0)) * class_weight[1 if label else 0]
+                for bucket, value in features.items():
+                    weight = self.weights.get(bucket, 0.0)
+                    self.weights[bucket] = weight - rate * (gradient * value + l2 * weight)
+                self.bias -= rate * gradient
+        return self
+
+    def save(self, path=DEFAULT_TRIAGE_MODEL_PATH):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "num_buckets": self.num_buckets,
+                "threshold": self.threshold,
+                "bias": self.bias,
+                "weights": {str(bucket): weight for bucket, weight in self.weights.items() if weight}
+            }, f)
+
+    @classmethod
+    def load(cls, path=DEFAULT_TRIAGE_MODEL_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(
+            weights={int(bucket): weight for bucket, weight in data["weights"].items()},
+            bias=data["bias"],
+            threshold=data["threshold"],
+            num_buckets=data["num_buckets"]
+        )
+
+def load_triage_model(path=DEFAULT_TRIAGE_MODEL_PATH, threshold=None):
+    """The trained model at path with an optional threshold override, or None (no triage) if there is none."""
+    if not path or not os.path.exists(path):
+        return None
+    model = CheckWorthinessModel.load(path)
+    if threshold is not None:
+        model.threshold = threshold
+    return model
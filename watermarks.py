@@ -0,0 +1,54 @@
+import sqlite3
+import time
+from threading import Lock
+
+DEFAULT_WATERMARK_PATH = "scrape_watermarks.sqlite3"
+
+def comment_count(value):
+    """A comment count as an int; the YouTube API returns counts as strings. None if unknown."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class WatermarkStore:
+    """Per-item scraping progress, persisted in SQLite for incremental runs.
+
+    The watermark of a post or video is the comment count it had when it was
+    last stored. A run still reads its usual listings and searches (each is
+    one request, or 100 YouTube units, whatever its time window), but skips
+    the comment, transcript and metadata fetches for items whose count has
+    not changed. New items have no watermark and are always fetched.
+    """
+    def __init__(self, path=DEFAULT_WATERMARK_PATH):
+        self.path = path
+        self.lock = Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS activity ("
+                "source TEXT NOT NULL, "
+                "item_id TEXT NOT NULL, "
+                "comments INTEGER, "
+                "seen_at REAL NOT NULL, "
+                "PRIMARY KEY (source, item_id))"
+            )
+
+    def activity_changed(self, source, item_id, comments):
+        """True for items never seen before, or whose comment count differs from the last run or is unknown."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT comments FROM activity WHERE source = ? AND item_id = ?", (source, item_id)
+            ).fetchone()
+        return row is None or row[0] is None or row[0] != comment_count(comments)
+
+    def record_activity(self, source, item_id, comments):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO activity (source, item_id, comments, seen_at) VALUES (?, ?, ?, ?)",
+                (source, item_id, comment_count(comments), time.time())
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()